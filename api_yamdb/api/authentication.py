@@ -0,0 +1,192 @@
+"""Аутентификация по JWT без запроса пользователя к БД.
+
+Токен, выданный get_access_token, содержит имя, роль, права и версию
+токенов пользователя. По ним собирается ClaimsUser, а полная модель
+загружается, только когда она нужна вьюхе. Смена роли или прав
+увеличивает User.token_version, и выданные ранее токены перестают
+приниматься. Токены без этих полей проверяются прежним способом,
+а загруженные из БД пользователи хранятся в UserCache процесса.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+CLAIMS = ("username", "role", "is_staff", "token_version")
+
+
+def get_token_version_key(user_id):
+    return f"token_version:{user_id}"
+
+
+def invalidate_token_version(user_id):
+    cache.delete(get_token_version_key(user_id))
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя: из кэша или одним запросом.
+    Для удаленного или неактивного пользователя - None."""
+    key = get_token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(
+            id=user_id, is_active=True
+        ).values_list("token_version", flat=True).first()
+        if version is None:
+            return None
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+class UserCache:
+    """Ограниченный LRU-кеш пользователей в памяти процесса.
+
+    Ключ - id пользователя и идентификатор токена, у записи есть срок
+    жизни. Записи пользователя удаляются сигналами при его изменении
+    или удалении. Наружу отдаются копии, чтобы запросы не меняли
+    общий объект."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return copy.copy(entry[0])
+
+    def set(self, key, user):
+        with self.lock:
+            self.entries[key] = (
+                copy.copy(user), time.monotonic() + self.timeout
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+user_cache = UserCache(
+    settings.USER_CACHE_MAXSIZE, settings.USER_CACHE_TIMEOUT
+)
+
+
+def get_cache_key(validated_token):
+    """id пользователя и идентификатор токена. simplejwt 4.7 не пишет
+    в токен iat, а jti так же различает токены, выданные в разное
+    время."""
+    return (
+        validated_token[api_settings.USER_ID_CLAIM],
+        validated_token[api_settings.JTI_CLAIM],
+    )
+
+
+def get_access_token(user):
+    """Токен доступа с данными, достаточными для проверки прав."""
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    return str(token)
+
+
+def get_user_model_instance(user):
+    """Полная модель пользователя для request.user любого вида."""
+    if isinstance(user, ClaimsUser):
+        return user.instance
+    return user
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, собранный из полей токена."""
+
+    @cached_property
+    def role(self):
+        return self.token["role"]
+
+    @property
+    def is_user(self):
+        return self.role == User.ROLES[0][0]
+
+    @property
+    def is_admin(self):
+        return self.role == User.ROLES[1][0]
+
+    @property
+    def is_moderator(self):
+        return self.role == User.ROLES[2][0]
+
+    @cached_property
+    def instance(self):
+        """Модель пользователя из БД, загружается при первом обращении."""
+        key = get_cache_key(self.token)
+        user = user_cache.get(key)
+        if user is None:
+            try:
+                user = User.objects.get(id=self.id, is_active=True)
+            except User.DoesNotExist:
+                raise AuthenticationFailed(
+                    "Пользователь не найден", code="user_not_found"
+                )
+            user_cache.set(key, user)
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Собирает request.user из токена вместо загрузки из БД."""
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            return self.get_cached_user(validated_token)
+        user = ClaimsUser(validated_token)
+        if get_token_version(user.id) != validated_token["token_version"]:
+            raise AuthenticationFailed(
+                "Токен отозван", code="token_revoked"
+            )
+        return user
+
+    def get_cached_user(self, validated_token):
+        """Пользователь из БД для токенов без полей пользователя.
+        Повторные запросы с тем же токеном берут его из user_cache."""
+        key = get_cache_key(validated_token)
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        return user
@@ -0,0 +1,195 @@
+"""Кеш ответов на анонимные GET-запросы и условные GET-запросы.
+
+Ключ ответа содержит адрес запроса, версию API, формат и версии,
+от которых зависит ответ. Сигналы записи увеличивают версии, и ответы
+со старыми версиями больше не находятся. Бэкенд задается алиасом
+RESPONSE_CACHE_ALIAS из CACHES: память, файлы, Redis.
+
+Версии бывают трех видов:
+- версия списка модели меняется при любой записи в модель, от нее
+  зависят списки, которые показывают объекты разных родителей;
+- версия объекта меняется при записи этого объекта и его отзывов или
+  комментариев, от нее зависят ответы про один объект: произведение,
+  отзывы произведения, комментарии отзыва. Запись в другое
+  произведение не меняет их ETag;
+- эпоха модели меняется, только когда неизвестно, какие объекты
+  затронуты: массовые изменения, правка категорий и жанров. Она
+  делает недействительными версии всех объектов модели.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def get_versions(cache, keys):
+    """Версии из кеша одним обращением. Начальное значение берется от
+    времени, чтобы после вытеснения ключа не вернуться к старой версии."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(cache, key):
+    cache.add(key, time.time_ns(), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_response_version_key(model, pk=None):
+    """Ключ версии списка модели или, с pk, версии объекта."""
+    key = f"api:response-version:{model._meta.label_lower}"
+    return key if pk is None else f"{key}:{pk}"
+
+
+def get_response_epoch_key(model):
+    return f"api:response-epoch:{model._meta.label_lower}"
+
+
+def get_modified_key(version_key):
+    return f"{version_key}:modified"
+
+
+def invalidate_response_cache(*models, resources=None):
+    """Делает недействительными ответы, прочитавшие модели, и запоминает
+    время изменения. resources - пары (модель, id) измененных объектов.
+    Без них изменение считается затронувшим все объекты моделей.
+    Версия увеличивается сразу и еще раз после коммита: иначе ответ,
+    прочитанный до коммита, сохранился бы под новой версией."""
+    keys = [get_response_version_key(model) for model in models]
+    if resources is None:
+        keys += [get_response_epoch_key(model) for model in models]
+    else:
+        keys += [
+            get_response_version_key(model, pk) for model, pk in resources
+        ]
+
+    def bump():
+        cache = get_response_cache()
+        for key in keys:
+            bump_version(cache, key)
+        cache.set_many(
+            {get_modified_key(key): time.time() for key in keys}, None
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def set_validators(response, etag, last_modified):
+    """Проставляет ETag и Last-Modified, в том числе ответу 304."""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+
+
+class CachedResponseMixin:
+    """Условные GET-запросы и кеш ответов для анонимных пользователей.
+
+    В cache_models перечисляются все модели, данные которых попадают в
+    ответ. Если ответ про конкретные объекты, get_cache_resources
+    возвращает пары (модель, id), и ответ зависит от версий этих
+    объектов и эпох cache_models, а не от версий списков. ETag и
+    Last-Modified считаются по кешу, без запросов к БД и без
+    сериализации."""
+    cache_models = ()
+
+    def get_cache_models(self):
+        return self.cache_models
+
+    def get_cache_resources(self):
+        return None
+
+    def get_version_keys(self):
+        models = self.get_cache_models()
+        resources = self.get_cache_resources()
+        if resources is None:
+            return [get_response_version_key(model) for model in models]
+        return [get_response_epoch_key(model) for model in models] + [
+            get_response_version_key(model, pk) for model, pk in resources
+        ]
+
+    def get_validators(self, request):
+        """Хеш для ETag и ключа кеша и время для Last-Modified.
+        Last-Modified не отдается, пока не закончилась секунда последнего
+        изменения: изменение в ту же секунду не поменяло бы заголовок,
+        и клиент получил бы 304."""
+        cache = get_response_cache()
+        keys = self.get_version_keys()
+        versions = get_versions(cache, keys)
+        modified = cache.get_many([get_modified_key(key) for key in keys])
+        digest = hashlib.md5(
+            f"{settings.API_VERSION}:{request.accepted_renderer.format}:"
+            f"{request.build_absolute_uri()}:"
+            f"{':'.join(map(str, versions))}".encode()
+        ).hexdigest()
+        last_modified = None
+        if len(modified) == len(keys):
+            last_modified = int(max(modified.values()))
+            if last_modified >= int(time.time()):
+                last_modified = None
+        return digest, last_modified
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """Версии моделей читаются до запроса к БД, поэтому данные
+        в кеше не старше версий из их ключа."""
+        if not self.get_cache_models():
+            return handler(request, *args, **kwargs)
+        digest, last_modified = self.get_validators(request)
+        etag = f'"{digest}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            if response.status_code == 304:
+                set_validators(response, etag, last_modified)
+            return response
+        cache = get_response_cache()
+        key = f"api:response:{digest}"
+        data = None
+        if not request.user.is_authenticated:
+            data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if not request.user.is_authenticated:
+                cache.set(
+                    key, response.data, settings.RESPONSE_CACHE_TIMEOUT
+                )
+        set_validators(response, etag, last_modified)
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    """Кеширует ответы list."""
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Кеширует ответы retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -3,17 +3,49 @@ from django_filters import rest_framework as filters
 from titles.models import Title
 
 
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Список строк через запятую."""
+
+
 class TitleFitler(filters.FilterSet):
-    """Фильтры произведений."""
+    """Фильтры произведений.
+    Слаги и год сравниваются точно, чтобы работали индексы.
+    Прежний поиск по вхождению включается параметром `fuzzy=true`."""
     name = filters.CharFilter(field_name="name", lookup_expr="contains")
-    year = filters.NumberFilter(field_name="year", lookup_expr="contains")
+    year = filters.NumberFilter(field_name="year", method="filter_fuzzy")
+    year_min = filters.NumberFilter(field_name="year", lookup_expr="gte")
+    year_max = filters.NumberFilter(field_name="year", lookup_expr="lte")
     category = filters.CharFilter(
-        field_name="category__slug", lookup_expr="contains"
+        field_name="category__slug", method="filter_fuzzy"
     )
+    category_in = CharInFilter(field_name="category__slug", lookup_expr="in")
     genre = filters.CharFilter(
-        field_name="genre__slug", lookup_expr="contains"
+        field_name="genre__slug", method="filter_fuzzy"
     )
+    genre_in = CharInFilter(field_name="genre__slug", method="filter_genre_in")
+    fuzzy = filters.BooleanFilter(method="filter_nothing")
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Title
-        fields = "__all__"
+        exclude = ("rating_sum", "rating_count")
+
+    def filter_nothing(self, queryset, name, value):
+        return queryset
+
+    def filter_fuzzy(self, queryset, name, value):
+        """Точное совпадение или, при `fuzzy=true`, вхождение."""
+        lookup = "contains" if self.form.cleaned_data["fuzzy"] else "exact"
+        return queryset.filter(**{f"{name}__{lookup}": value})
+
+    def filter_genre_in(self, queryset, name, value):
+        """Произведения хотя бы с одним из жанров.
+        Подзапрос по связующей таблице не дает дублей без DISTINCT."""
+        title_ids = Title.genre.through.objects.filter(
+            genre__slug__in=value
+        ).values("title_id")
+        return queryset.filter(id__in=title_ids)
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с сортировкой по релевантности."""
+        return queryset.search(value)
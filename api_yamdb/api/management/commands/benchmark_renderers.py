@@ -0,0 +1,110 @@
+import random
+import time
+
+from django.core.management import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+
+WORDS = (
+    "фильм", "книга", "отличный", "сюжет", "герой", "финал", "музыка",
+    "рекомендую", "скучно", "актеры", "режиссер", "впечатление",
+)
+
+
+class StdlibJSONRenderer(FastJSONRenderer):
+    use_orjson = False
+
+
+def make_text(rnd, words):
+    return " ".join(rnd.choices(WORDS, k=words)).capitalize() + "."
+
+
+def make_title(rnd, idx):
+    return {
+        "id": idx,
+        "name": make_text(rnd, 3),
+        "year": rnd.randint(1900, 2020),
+        "rating": round(rnd.uniform(1, 10), 2),
+        "description": make_text(rnd, 40),
+        "genre": [
+            {"name": "Драма", "slug": "drama"},
+            {"name": "Комедия", "slug": "comedy"},
+        ],
+        "category": {"name": "Фильм", "slug": "movie"},
+    }
+
+
+def make_review(rnd, idx):
+    return {
+        "id": idx,
+        "text": make_text(rnd, 60),
+        "author": f"пользователь{idx}",
+        "score": rnd.randint(1, 10),
+        "pub_date": "2023-07-13T14:52:00.123456Z",
+    }
+
+
+def make_comment(rnd, idx):
+    return {
+        "id": idx,
+        "text": make_text(rnd, 20),
+        "author": f"пользователь{idx}",
+        "pub_date": "2023-07-13T14:52:00.123456Z",
+    }
+
+
+PAGES = {
+    "titles": make_title,
+    "reviews": make_review,
+    "comments": make_comment,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время рендеринга страниц произведений, отзывов и "
+        "комментариев в JSONRenderer и FastJSONRenderer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[5, 50, 500]
+        )
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        renderers = {
+            "JSONRenderer": JSONRenderer(),
+            "stdlib": StdlibJSONRenderer(),
+        }
+        if orjson is not None:
+            renderers["orjson"] = FastJSONRenderer()
+        for name, make_item in PAGES.items():
+            for size in options["sizes"]:
+                page = {
+                    "count": size * 10,
+                    "next": f"http://testserver/api/v1/{name}/?page=2",
+                    "previous": None,
+                    "results": [make_item(rnd, idx) for idx in range(size)],
+                }
+                results = {
+                    label: self.measure(renderer, page, options["repeat"])
+                    for label, renderer in renderers.items()
+                }
+                base = results["JSONRenderer"]
+                self.stdout.write(f"{name}, {size} на странице:")
+                for label, spent in results.items():
+                    self.stdout.write(
+                        f"  {label}: {spent * 1000:.3f} мс "
+                        f"({base / spent:.1f}x)"
+                    )
+
+    def measure(self, renderer, page, repeat):
+        """Среднее время рендеринга страницы."""
+        start = time.perf_counter()
+        for _ in range(repeat):
+            renderer.render(page, "application/json")
+        return (time.perf_counter() - start) / repeat
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import StatelessJWTAuthentication, user_cache
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает аутентификацию JWT с загрузкой пользователя из БД "
+        "и с кешем пользователей. Данные удаляются после замера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            User.objects.bulk_create(
+                User(username=f"benchmark{idx}",
+                     email=f"benchmark{idx}@yamdb.fake")
+                for idx in range(options["users"])
+            )
+            users = User.objects.filter(username__startswith="benchmark")
+            requests = [
+                RequestFactory().get(
+                    "/",
+                    HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+                )
+                for user in users
+            ]
+            user_cache.clear()
+            old = self.measure(JWTAuthentication(), requests, options)
+            new = self.measure(StatelessJWTAuthentication(), requests, options)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Без кеша: {old * 1000:.3f} мс на запрос")
+        self.stdout.write(f"С кешем: {new * 1000:.3f} мс на запрос")
+        self.stdout.write(
+            f"Доля попаданий в кеш: {user_cache.hit_ratio:.1%}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Экономия: {(old - new) * 1000:.3f} мс на запрос"
+        ))
+
+    def measure(self, authentication, requests, options):
+        """Среднее время аутентификации запроса, пользователи
+        чередуются по кругу."""
+        total = options["requests"]
+        start = time.perf_counter()
+        for idx in range(total):
+            authentication.authenticate(requests[idx % len(requests)])
+        return (time.perf_counter() - start) / total
@@ -0,0 +1,175 @@
+"""Пагинация приложения api."""
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+
+from api.cache import bump_version, get_versions
+
+
+def get_count_version_key(model):
+    return f"api:count-version:{model._meta.label_lower}"
+
+
+def invalidate_count_cache(model):
+    """Делает недействительными все сохраненные количества объектов
+    модели."""
+    bump_version(cache, get_count_version_key(model))
+
+
+def get_count_cache_key(queryset):
+    """Ключ кеша количества объектов для конкретного набора фильтров."""
+    model = queryset.model
+    [version] = get_versions(cache, [get_count_version_key(model)])
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(sql.encode()).hexdigest()
+    return f"api:count:{model._meta.label_lower}:{version}:{digest}"
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берет количество объектов из кеша."""
+
+    def __init__(self, *args, cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return super().count
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            self.cache_count(count)
+        return count
+
+    def cache_count(self, count):
+        self.count = count
+        if self.cache_key is not None:
+            cache.set(self.cache_key, count, settings.COUNT_CACHE_TIMEOUT)
+
+    def page(self, number):
+        """Страница не обрезается по количеству из кеша: оно может
+        устареть, например после bulk_create без сигналов. По самой
+        странице количество уточняется и сохраняется в кеш."""
+        number = self.validate_positive_number(number)
+        bottom = (number - 1) * self.per_page
+        # Лишний объект показывает, есть ли следующая страница.
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page + 1]
+        )
+        has_next = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not object_list and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        found = bottom + len(object_list)
+        if not has_next and found != self.count:
+            self.cache_count(found)
+        elif has_next and found >= self.count:
+            self.cache_count(found + 1)
+        return self._get_page(object_list, number, self)
+
+    def validate_positive_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+
+class CachedCountPagination(PageNumberPagination):
+    """Пагинация по номеру страницы с кешированным `count`.
+    Точное количество возвращается с параметром `count=exact`."""
+    count_query_param = "count"
+    exact_count = "exact"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.count_query_param) != (
+            self.exact_count
+        ):
+            self.django_paginator_class = partial(
+                CachedCountPaginator,
+                cache_key=get_count_cache_key(queryset),
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Курсорная пагинация по индексированным pub_date и id.
+    Не выполняет COUNT и не использует OFFSET для дальних страниц."""
+    ordering = ("-pub_date", "-id")
+
+
+class IdCursorPagination(CursorPagination):
+    """Курсорная пагинация по первичному ключу."""
+    ordering = ("-id",)
+
+
+class OptionalCursorPagination(BasePagination):
+    """По умолчанию пагинация по номеру страницы.
+    Курсорная включается параметром `pagination=cursor`, дальше
+    ссылки next/previous содержат параметр `cursor`."""
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    cursor_pagination_class = PubDateCursorPagination
+    page_number_pagination_class = CachedCountPagination
+
+    def is_cursor_mode(self, request):
+        cursor_class = self.cursor_pagination_class
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.cursor_pagination_class()
+        else:
+            self.paginator = self.page_number_pagination_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_fields(self, view):
+        return self.page_number_pagination_class().get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        paginator = self.page_number_pagination_class()
+        return paginator.get_schema_operation_parameters(view)
+
+
+class TitlePagination(OptionalCursorPagination):
+    """Пагинация произведений: курсор по id.
+    Курсор сортирует по id и отбросил бы сортировку результатов поиска
+    по релевантности, поэтому вместе с `search` он недоступен."""
+    cursor_pagination_class = IdCursorPagination
+    search_query_param = "search"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request) and (
+            request.query_params.get(self.search_query_param)
+        ):
+            raise ValidationError({
+                self.mode_query_param: (
+                    "Курсорная пагинация недоступна при поиске: "
+                    "результаты поиска сортируются по релевантности."
+                )
+            })
+        return super().paginate_queryset(queryset, request, view)
@@ -13,8 +13,9 @@ class IsRedactor(BasePermission):
             return True
         if request.method == "POST":
             return request.user.is_authenticated
+        # Сравнение id не загружает автора из БД.
         return (
-            obj.author == request.user
+            obj.author_id == request.user.id
             or request.user.is_admin
             or request.user.is_moderator
         ) and request.user.is_authenticated
@@ -34,6 +35,18 @@ class IsAdmin(BasePermission):
         ) and request.user.is_authenticated
 
 
+class IsModerator(BasePermission):
+    """Права модератора. Админу они тоже есть."""
+    def has_permission(self, request, view):
+        if request.user.is_authenticated:
+            return (
+                request.user.is_moderator
+                or request.user.is_admin
+                or request.user.is_staff
+            )
+        return False
+
+
 class ReadOnly(BasePermission):
     """Права на чтение всем, без токена."""
     def has_permission(self, request, view):
@@ -50,4 +63,4 @@ class Me(BasePermission):
         return request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        return request.user == obj
+        return request.user.pk == obj.pk
@@ -0,0 +1,54 @@
+"""Быстрый JSON-рендерер.
+
+Данные кодируются orjson из requirements.txt. Если его нет
+в окружении, используется стандартный json с заранее созданным
+кодировщиком: без ensure_ascii, чтобы кириллица не превращалась
+в \\uXXXX, и без проверки циклов.
+"""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ENCODER = JSONEncoder(
+    ensure_ascii=False,
+    check_circular=False,
+    allow_nan=False,
+    separators=(",", ":"),
+)
+
+# Даты и ключи-не-строки кодируются так же, как в JSONRenderer.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson is not None else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson или на подготовленном кодировщике json.
+    Ответы с отступами (browsable API, `indent=`) строит JSONRenderer."""
+    use_orjson = orjson is not None
+
+    def dumps(self, data):
+        if self.use_orjson:
+            return orjson.dumps(
+                data, default=ENCODER.default, option=ORJSON_OPTIONS
+            )
+        return ENCODER.encode(data).encode()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = self.dumps(data)
+        # Как в JSONRenderer: U+2028 и U+2029 экранируются, чтобы ответ
+        # оставался корректным JavaScript.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
@@ -1,8 +1,12 @@
 """Сериализаторы приложения api."""
+from collections import defaultdict
+
 from django.conf import settings
 from django.core.validators import RegexValidator
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from api.utils import generate_short_hash_mm3
 from reviews.models import Comments, Review
@@ -10,7 +14,18 @@ from titles.models import Category, Genre, Title
 from users.models import User
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class SparseFieldsSerializer(serializers.ModelSerializer):
+    """Сериализатор, который оставляет только поля из context["fields"]."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CategorySerializer(SparseFieldsSerializer):
     """Сериализатор модели Category."""
 
     class Meta:
@@ -19,7 +34,7 @@ class CategorySerializer(serializers.ModelSerializer):
         lookup_field = "slug"
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsSerializer):
     """Сериализатор модели Genre."""
 
     class Meta:
@@ -28,22 +43,35 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = "slug"
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class RatingField(serializers.Field):
+    """Рейтинг произведения.
+    Берется из аннотации queryset, а если ее нет - из сохраненных
+    суммы и количества оценок. Отзывы при этом не загружаются."""
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, title):
+        if hasattr(title, "rating"):
+            return title.rating
+        if not title.rating_count:
+            return None
+        return title.rating_sum / title.rating_count
+
+
+class TitleGetSerializer(SparseFieldsSerializer):
     """Сериализатор вывода модели Title."""
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
-    rating = serializers.SerializerMethodField()
+    rating = RatingField()
 
     class Meta:
         model = Title
-        fields = "__all__"
-
-    def get_rating(self, title):
-        reviews = title.reviews.all()
-        if not reviews:
-            return None
-        total_score = sum(review.score for review in reviews)
-        return total_score / len(reviews)
+        fields = (
+            "id", "name", "year", "rating", "description", "genre", "category"
+        )
 
 
 class TitlePostSerializer(serializers.ModelSerializer):
@@ -57,10 +85,115 @@ class TitlePostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = "__all__"
+        fields = ("id", "name", "year", "description", "genre", "category")
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """Список произведений для массового создания и обновления.
+
+    Слаги категорий и жанров и id обновляемых произведений проверяются
+    одним запросом каждые. Ошибки возвращаются списком по порядку
+    элементов, и при любой ошибке ничего не сохраняется."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > settings.BULK_TITLES_LIMIT:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    "Можно передать не больше "
+                    f"{settings.BULK_TITLES_LIMIT} произведений."
+                ]
+            })
+        items = super().to_internal_value(data)
+        categories = dict(Category.objects.filter(
+            slug__in={item["category"] for item in items}
+        ).values_list("slug", "id"))
+        genres = dict(Genre.objects.filter(
+            slug__in={slug for item in items for slug in item["genre"]}
+        ).values_list("slug", "id"))
+        ids = [item["id"] for item in items if "id" in item]
+        existing = set(
+            Title.objects.filter(id__in=ids).values_list("id", flat=True)
+        )
+        errors = []
+        seen = set()
+        for item in items:
+            item["genre"] = list(dict.fromkeys(item["genre"]))
+            error = {}
+            if item["category"] not in categories:
+                error["category"] = [
+                    f"Категория {item['category']} не найдена."
+                ]
+            unknown = [slug for slug in item["genre"] if slug not in genres]
+            if unknown:
+                error["genre"] = [
+                    f"Жанры не найдены: {', '.join(unknown)}."
+                ]
+            if "id" in item:
+                if item["id"] not in existing:
+                    error["id"] = [f"Произведение {item['id']} не найдено."]
+                elif item["id"] in seen:
+                    error["id"] = [f"Произведение {item['id']} повторяется."]
+                seen.add(item["id"])
+            errors.append(error)
+            item["category_id"] = categories.get(item["category"])
+            item["genre_ids"] = [genres.get(slug) for slug in item["genre"]]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
 
+    def create(self, validated_data):
+        """Новые произведения - bulk_create, изменения - bulk_update,
+        связи с жанрами - bulk_create связующей таблицы. Все в одной
+        транзакции. У изменяемых произведений записываются только
+        переданные поля: bulk_update вызывается на каждый набор полей."""
+        fields = ("name", "year", "description", "category_id")
+        titles = []
+        changed = defaultdict(list)
+        for item in validated_data:
+            supplied = tuple(field for field in fields if field in item)
+            title = Title(
+                id=item.get("id"),
+                **{field: item[field] for field in supplied},
+            )
+            titles.append(title)
+            if title.id is not None:
+                changed[supplied].append(title)
+        new = [title for title in titles if title.id is None]
+        through = Title.genre.through
+        with transaction.atomic():
+            Title.objects.bulk_create_with_pk(new)
+            for supplied, objs in changed.items():
+                Title.objects.bulk_update(objs, supplied)
+            if changed:
+                through.objects.filter(title_id__in=[
+                    title.id for objs in changed.values() for title in objs
+                ]).delete()
+            through.objects.bulk_create(
+                through(title_id=title.id, genre_id=genre_id)
+                for title, item in zip(titles, validated_data)
+                for genre_id in item["genre_ids"]
+            )
+        for title, item in zip(titles, validated_data):
+            item["id"] = title.id
+        return validated_data
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки: произведение со слагами категории
+    и жанров. С `id` обновляет существующее произведение."""
+    id = serializers.IntegerField(required=False)
+    category = serializers.SlugField()
+    genre = serializers.ListField(
+        child=serializers.SlugField(), allow_empty=False
+    )
 
-class ReviewSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Title
+        fields = ("id", "name", "year", "description", "genre", "category")
+        list_serializer_class = TitleBulkListSerializer
+
+
+class ReviewSerializer(SparseFieldsSerializer):
     """Сериализатор модели Review."""
     author = serializers.SlugRelatedField(
         slug_field="username",
@@ -76,9 +209,9 @@ class ReviewSerializer(serializers.ModelSerializer):
         """Пользователь может оставить только один отзыв на произведение."""
         if self.context.get("request").method != "POST":
             return data
-        author = self.context.get("request").user
+        author_id = self.context.get("request").user.id
         title_id = self.context.get("view").kwargs.get("title_id")
-        review = Review.objects.filter(title=title_id, author=author)
+        review = Review.objects.filter(title=title_id, author_id=author_id)
         if review.exists():
             raise serializers.ValidationError(
                 "Вы уже оставили отзыв на это произведение."
@@ -86,7 +219,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(SparseFieldsSerializer):
     """Сериализатор для модели Comments."""
     author = serializers.SlugRelatedField(
         slug_field="username",
@@ -99,6 +232,64 @@ class CommentsSerializer(serializers.ModelSerializer):
         model = Comments
 
 
+class ReviewWithCommentsSerializer(ReviewSerializer):
+    """Отзыв с последними комментариями для `expand=reviews.comments`."""
+    comments = CommentsSerializer(
+        many=True, read_only=True, source="latest_comments"
+    )
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ("comments",)
+
+
+class TitleWithReviewsSerializer(TitleGetSerializer):
+    """Произведение с последними отзывами для `expand=reviews`."""
+    reviews = ReviewSerializer(
+        many=True, read_only=True, source="latest_reviews"
+    )
+
+    class Meta(TitleGetSerializer.Meta):
+        fields = TitleGetSerializer.Meta.fields + ("reviews",)
+
+
+class TitleWithCommentsSerializer(TitleWithReviewsSerializer):
+    """Произведение с последними отзывами и комментариями к ним."""
+    reviews = ReviewWithCommentsSerializer(
+        many=True, read_only=True, source="latest_reviews"
+    )
+
+
+class ModerationDeleteSerializer(serializers.Serializer):
+    """Условия массового удаления отзывов или комментариев.
+    Условия объединяются через И, нужно хотя бы одно."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.MODERATION_IDS_LIMIT,
+        required=False,
+    )
+    author = serializers.SlugRelatedField(
+        slug_field="username", queryset=User.objects.all(), required=False
+    )
+    title = serializers.IntegerField(min_value=1, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError(
+                "Укажите id или хотя бы один фильтр: author, title, "
+                "since, until."
+            )
+        if "since" in data and "until" in data and (
+            data["since"] > data["until"]
+        ):
+            raise serializers.ValidationError(
+                {"until": "Конец периода раньше начала."}
+            )
+        return data
+
+
 class RegistrationSerializer(serializers.ModelSerializer):
     """Сериализация регистрации пользователя и создания нового."""
     username = serializers.CharField(
@@ -0,0 +1,90 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import invalidate_token_version, user_cache
+from api.cache import invalidate_response_cache
+from api.pagination import invalidate_count_cache
+from reviews.models import Comments, Review, publications_deleted
+from titles.models import Category, Genre, Title, titles_changed
+from users.models import User
+
+# Изменение модели-ключа меняет количество объектов моделей-значений:
+# в фильтрах произведений участвуют категории и жанры, а удаление
+# произведения или отзыва каскадно удаляет отзывы и комментарии.
+COUNT_DEPENDENCIES = {
+    Title: (Title, Review, Comments),
+    Category: (Title,),
+    Genre: (Title,),
+    Review: (Review, Comments),
+    Comments: (Comments,),
+}
+
+
+def get_comment_title_id(comment):
+    """id произведения комментария. Через API отзыв уже загружен,
+    иначе id читается одним запросом."""
+    if Comments.review.is_cached(comment):
+        return comment.review.title_id
+    return Review.objects.filter(pk=comment.review_id).values_list(
+        "title_id", flat=True
+    ).first()
+
+
+# Объекты, ответы про которые меняются вместе с объектом модели-ключа:
+# рейтинг и встроенные отзывы произведения зависят от отзывов,
+# встроенные комментарии - от комментариев. Категории и жанры
+# показываются во всех произведениях, поэтому их изменение
+# затрагивает все ответы.
+RESOURCE_DEPENDENCIES = {
+    Title: lambda title: [(Title, title.pk)],
+    Review: lambda review: [(Review, review.pk), (Title, review.title_id)],
+    Comments: lambda comment: [
+        (Review, comment.review_id), (Title, get_comment_title_id(comment)),
+    ],
+}
+
+
+def invalidate_model_caches(sender, instance=None, **kwargs):
+    for model in COUNT_DEPENDENCIES[sender]:
+        invalidate_count_cache(model)
+    resources = None
+    if instance is not None and sender in RESOURCE_DEPENDENCIES:
+        resources = RESOURCE_DEPENDENCIES[sender](instance)
+    invalidate_response_cache(sender, resources=resources)
+
+
+for model in COUNT_DEPENDENCIES:
+    post_save.connect(invalidate_model_caches, sender=model)
+    post_delete.connect(invalidate_model_caches, sender=model)
+
+for model in (Review, Comments):
+    publications_deleted.connect(invalidate_model_caches, sender=model)
+
+
+@receiver(titles_changed, sender=Title)
+def invalidate_changed_titles(sender, ids=None, **kwargs):
+    invalidate_count_cache(Title)
+    resources = None if ids is None else [(Title, pk) for pk in ids]
+    invalidate_response_cache(Title, resources=resources)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, **kwargs):
+    if action.startswith("post_"):
+        invalidate_count_cache(Title)
+        resources = None if reverse else [(Title, instance.pk)]
+        invalidate_response_cache(Title, resources=resources)
+
+
+# Поля пользователя, которые не выводятся в ответах API. Сохранение
+# только этих полей, например при выдаче токена, не меняет ответы.
+HIDDEN_USER_FIELDS = frozenset(("updated_at", "last_login", "password"))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_caches(sender, instance, update_fields=None, **kwargs):
+    invalidate_token_version(instance.id)
+    user_cache.invalidate(instance.id)
+    if update_fields is None or not update_fields <= HIDDEN_USER_FIELDS:
+        invalidate_response_cache(User)
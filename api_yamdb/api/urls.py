@@ -4,9 +4,11 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from api.views import (CategoryViewSet, CommentsViewSet,
-                       ConfirmationEmailAPIView, GenreViewSet,
-                       MeRetrieveUpdateAPIView, RegistrationAPIView,
-                       ReviewViewSet, TitleViewSet, UserViewSet)
+                       ConfirmationEmailAPIView, ExportAPIView, GenreViewSet,
+                       MeRetrieveUpdateAPIView, ModerationDeleteAPIView,
+                       RegistrationAPIView, ReviewViewSet, TitleViewSet,
+                       UserViewSet)
+from reviews.models import Comments, Review
 
 # Версия API
 API_VERSION = settings.API_VERSION
@@ -29,5 +31,19 @@ urlpatterns = [
     path(f"{API_VERSION}/auth/signup/", RegistrationAPIView.as_view()),
     path(f"{API_VERSION}/auth/token/", ConfirmationEmailAPIView.as_view()),
     path(f"{API_VERSION}/users/me/", MeRetrieveUpdateAPIView.as_view()),
+    path(
+        f"{API_VERSION}/export/<str:dataset>.<str:file_format>",
+        ExportAPIView.as_view(),
+    ),
+    path(
+        f"{API_VERSION}/moderation/reviews/delete/",
+        ModerationDeleteAPIView.as_view(model=Review),
+    ),
+    path(
+        f"{API_VERSION}/moderation/comments/delete/",
+        ModerationDeleteAPIView.as_view(
+            model=Comments, title_lookup="review__title_id"
+        ),
+    ),
     path(f"{API_VERSION}/", include(router.urls)),
 ]
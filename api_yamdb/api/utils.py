@@ -1,11 +1,59 @@
 import mmh3
 
 from django.conf import settings
-from django.core.mail import send_mail
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
 from rest_framework.viewsets import GenericViewSet
 
+from users.models import EmailOutbox
+
+
+def split_param(value):
+    """Значения параметра запроса через запятую."""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class SparseFieldsMixin:
+    """Параметры `fields` и `omit` при чтении: какие поля оставить
+    в ответе и какие убрать, через запятую. Выбранные поля передаются
+    сериализатору в контексте, а get_queryset может не загружать
+    лишнее, проверяя wants_field."""
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+
+    @cached_property
+    def requested_fields(self):
+        """Поля ответа в порядке сериализатора или None для всех полей."""
+        if self.action not in ("list", "retrieve"):
+            return None
+        params = self.request.query_params
+        fields = split_param(params.get(self.fields_query_param))
+        omit = split_param(params.get(self.omit_query_param))
+        if not fields and not omit:
+            return None
+        available = list(self.get_serializer_class()().fields)
+        unknown = sorted(set(fields + omit) - set(available))
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param: [
+                    f"Неизвестные поля: {', '.join(unknown)}."
+                ]
+            })
+        return [
+            name for name in available
+            if (not fields or name in fields) and name not in omit
+        ]
+
+    def wants_field(self, name):
+        return self.requested_fields is None or name in self.requested_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.requested_fields
+        return context
+
 
 class CategoryGenreMixinSet(
     CreateModelMixin, DestroyModelMixin, ListModelMixin, GenericViewSet
@@ -14,10 +62,11 @@ class CategoryGenreMixinSet(
 
 
 def send_email_confirm(email: str, code: str) -> None:
-    """Отправка кода подтверждения на email."""
+    """Ставит письмо с кодом подтверждения в очередь. Письмо отправляет
+    команда send_emails."""
     subject = "Подтверждение регистрации"
     message = f"Код для подтверждения регистрации: {code}"
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+    EmailOutbox.objects.enqueue(email, subject, message)
 
 
 def generate_short_hash_mm3(data: str) -> str:
@@ -1,30 +1,43 @@
 """Вьюхи приложения api."""
-from django.db.models import Avg
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.authentication import get_access_token, get_user_model_instance
+from api.cache import CachedListMixin, CachedRetrieveMixin
 from api.filters import TitleFitler
-from api.permissions import IsAdmin, IsRedactor, Me, ReadOnly
+from api.pagination import OptionalCursorPagination, TitlePagination
+from api.permissions import IsAdmin, IsModerator, IsRedactor, Me, ReadOnly
 from api.serializers import (CategorySerializer, CommentsSerializer,
                              ConfirmRegistrationSerializer, GenreSerializer,
-                             MeSerializer, RegistrationSerializer,
-                             ReviewSerializer, TitleGetSerializer,
-                             TitlePostSerializer, UserSerializer)
-from api.utils import (CategoryGenreMixinSet, generate_short_hash_mm3,
-                       send_email_confirm)
-from reviews.models import Review
+                             MeSerializer, ModerationDeleteSerializer,
+                             RegistrationSerializer, ReviewSerializer,
+                             TitleBulkSerializer, TitleGetSerializer,
+                             TitlePostSerializer, TitleWithCommentsSerializer,
+                             TitleWithReviewsSerializer, UserSerializer)
+from api.utils import (CategoryGenreMixinSet, SparseFieldsMixin,
+                       generate_short_hash_mm3, send_email_confirm,
+                       split_param)
+from reviews.export import DATASETS, export_lines
+from reviews.models import Comments, Review
 from titles.models import Category, Genre, Title
 from users.models import User
 
 
 class RegistrationAPIView(APIView):
-    """Создает нового пользователя. Отправляет код подтверждения."""
+    """Создает нового пользователя. Ставит письмо с кодом подтверждения
+    в очередь."""
     permission_classes = (AllowAny,)
 
     def post(self, request):
@@ -34,14 +47,19 @@ class RegistrationAPIView(APIView):
         """
         serializer = RegistrationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user, created = serializer.save(defaults={"updated_at": timezone.now})
-
-        code = generate_short_hash_mm3(
-            f"{user.username}{user.email}{user.updated_at}"
-        )
-
-        # Отправка кода на email
-        send_email_confirm(user.email, code)
+        # Пользователь и письмо с кодом сохраняются в одной транзакции:
+        # письмо уйдет, только если пользователь записан.
+        with transaction.atomic():
+            user, created = serializer.save(
+                defaults={"updated_at": timezone.now}
+            )
+
+            code = generate_short_hash_mm3(
+                f"{user.username}{user.email}{user.updated_at}"
+            )
+
+            # Постановка письма с кодом в очередь
+            send_email_confirm(user.email, code)
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
@@ -55,15 +73,95 @@ class ConfirmationEmailAPIView(APIView):
         user = serializer.validated_data.get("username")
         # Обновляем дату, чтобы сделать код невалидным
         user.updated_at = timezone.now()
-        user.save()
+        user.save(update_fields=["updated_at"])
 
-        token = str(RefreshToken.for_user(user).access_token)
+        token = get_access_token(user)
 
         return Response({"token": token}, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class ExportAPIView(APIView):
+    """Потоковая выгрузка набора данных в CSV или NDJSON. Только админ."""
+    permission_classes = (IsAdmin,)
+    content_types = {
+        "csv": "text/csv; charset=utf-8",
+        "ndjson": "application/x-ndjson; charset=utf-8",
+    }
+
+    def perform_content_negotiation(self, request, force=False):
+        """Формат выгрузки задается расширением в URL, поэтому Accept
+        вида text/csv не приводит к 406. Ошибки отдаются в JSON."""
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, dataset, file_format):
+        if dataset not in DATASETS or file_format not in self.content_types:
+            raise Http404
+        response = StreamingHttpResponse(
+            export_lines(dataset, file_format),
+            content_type=self.content_types[file_format],
+        )
+        filename = DATASETS[dataset].get_filename(file_format)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class ModerationDeleteAPIView(APIView):
+    """Массовое удаление отзывов или комментариев по списку id или
+    фильтрам. Только модератор и админ. Удаление идет пачками без
+    загрузки объектов, рейтинг произведений пересчитывается один раз
+    после всех пачек."""
+    permission_classes = (IsModerator,)
+    model = None
+    # Путь к id произведения от удаляемой модели.
+    title_lookup = "title_id"
+
+    def post(self, request):
+        serializer = ModerationDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        lookups = {
+            "pk__in": data.get("ids"),
+            "author": data.get("author"),
+            self.title_lookup: data.get("title"),
+            "pub_date__gte": data.get("since"),
+            "pub_date__lte": data.get("until"),
+        }
+        queryset = self.model.objects.filter(**{
+            lookup: value
+            for lookup, value in lookups.items() if value is not None
+        })
+        deleted = queryset.delete_in_batches(settings.MODERATION_BATCH_SIZE)
+        return Response({"deleted": deleted})
+
+
+class AuthorSparseFieldsMixin(SparseFieldsMixin):
+    """Выбор полей для отзывов и комментариев."""
+    # Внешний ключ на родителя из URL. Django читает его у каждой строки
+    # связанного менеджера, поэтому он загружается всегда.
+    parent_field = None
+
+    def prune_queryset(self, queryset):
+        """Автор подгружается, только если он нужен в ответе, а при
+        выборе `fields` загружаются только нужные колонки. pub_date
+        нужна курсорной пагинации и загружается всегда."""
+        if self.wants_field("author"):
+            queryset = queryset.select_related("author")
+        if self.requested_fields is None:
+            return queryset
+        columns = [
+            "author__username" if name == "author" else name
+            for name in self.requested_fields
+        ]
+        return queryset.only("id", "pub_date", self.parent_field, *columns)
+
+
+class UserViewSet(
+    CachedListMixin, CachedRetrieveMixin, viewsets.ModelViewSet
+):
     """Позволяет выполнить все операции CRUD с пользователями."""
+    cache_models = (User,)
     http_method_names = ("get", "post", "patch", "delete")
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -78,20 +176,23 @@ class MeRetrieveUpdateAPIView(APIView):
     permission_classes = (Me,)
 
     def get(self, request):
-        user = request.user
+        user = get_user_model_instance(request.user)
         serializer = MeSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request, format=None):
-        user = request.user
+        user = get_user_model_instance(request.user)
         serializer = MeSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class GenreViewSet(CategoryGenreMixinSet):
+class GenreViewSet(
+    CachedListMixin, SparseFieldsMixin, CategoryGenreMixinSet
+):
     """Вьюсет жанр."""
+    cache_models = (Genre,)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [ReadOnly | IsAdmin]
@@ -100,8 +201,11 @@ class GenreViewSet(CategoryGenreMixinSet):
     lookup_field = "slug"
 
 
-class CategoryViewSet(CategoryGenreMixinSet):
+class CategoryViewSet(
+    CachedListMixin, SparseFieldsMixin, CategoryGenreMixinSet
+):
     """Вьюсет категорий."""
+    cache_models = (Category,)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [ReadOnly | IsAdmin]
@@ -110,53 +214,251 @@ class CategoryViewSet(CategoryGenreMixinSet):
     lookup_field = "slug"
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    """Вьюсет произведений."""
-    queryset = Title.objects.annotate(rating=Avg("reviews__score"))
+class TitleViewSet(
+    CachedListMixin,
+    CachedRetrieveMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
+    """Вьюсет произведений. Рейтинг зависит от отзывов."""
+    cache_models = (Title, Category, Genre, Review)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFitler
+    pagination_class = TitlePagination
     permission_classes = [ReadOnly | IsAdmin]
     http_method_names = ("get", "post", "patch", "delete")
 
+    expand_query_param = "expand"
+    expand_choices = ("reviews", "reviews.comments")
+    ids_query_param = "ids"
+
+    # Колонки, которые нужны полям ответа при выборе `fields`.
+    only_fields = {
+        "name": ("name",),
+        "year": ("year",),
+        "description": ("description",),
+        "category": ("category__name", "category__slug"),
+    }
+
+    def get_queryset(self):
+        """Связанные объекты подгружаются сразу, под нужды действия:
+        чтение выводит рейтинг, категорию и жанры, изменение - слаги
+        категории и жанров, удалению связанные объекты не нужны.
+        При чтении с `fields`/`omit` не загружается то, что не попадет
+        в ответ."""
+        queryset = Title.objects.all()
+        if self.action == "destroy":
+            return queryset
+        if self.action not in ("list", "retrieve"):
+            return queryset.select_related("category").prefetch_related(
+                "genre"
+            )
+        if self.wants_field("category"):
+            queryset = queryset.select_related("category")
+        if self.wants_field("genre"):
+            queryset = queryset.prefetch_related("genre")
+        if self.wants_field("rating"):
+            queryset = queryset.with_rating()
+        if "reviews" in self.expanded and self.wants_field("reviews"):
+            queryset = self.prefetch_latest(queryset)
+        if self.requested_fields is not None:
+            queryset = queryset.only("id", *(
+                column
+                for name in self.requested_fields
+                for column in self.only_fields.get(name, ())
+            ))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if self.ids_query_param in request.query_params:
+            return self.get_cached_response(
+                self.list_by_ids, request, *args, **kwargs
+            )
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Массовое создание и обновление произведений."""
+        serializer = TitleBulkSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def get_requested_ids(self):
+        """id из параметра `ids` в порядке запроса, без повторов."""
+        values = split_param(
+            self.request.query_params.get(self.ids_query_param)
+        )
+        if not all(value.isdigit() for value in values):
+            raise ValidationError({
+                self.ids_query_param: ["Ожидаются id через запятую."]
+            })
+        ids = list(dict.fromkeys(int(value) for value in values))
+        if not ids or len(ids) > settings.MULTI_GET_LIMIT:
+            raise ValidationError({
+                self.ids_query_param: [
+                    f"Можно запросить от 1 до {settings.MULTI_GET_LIMIT} "
+                    "произведений."
+                ]
+            })
+        return ids
+
+    def list_by_ids(self, request, *args, **kwargs):
+        """Произведения по списку id без пагинации, в порядке запроса.
+        Не найденные id перечисляются в `missing`."""
+        ids = self.get_requested_ids()
+        titles = {
+            title.id: title
+            for title in self.filter_queryset(self.get_queryset()).filter(
+                id__in=ids
+            )
+        }
+        serializer = self.get_serializer(
+            [titles[title_id] for title_id in ids if title_id in titles],
+            many=True,
+        )
+        return Response({
+            "results": serializer.data,
+            "missing": [
+                title_id for title_id in ids if title_id not in titles
+            ],
+        })
+
+    @cached_property
+    def expanded(self):
+        """Связи из параметра `expand`, которые встраиваются в ответ."""
+        if self.action not in ("list", "retrieve"):
+            return set()
+        expanded = set(split_param(
+            self.request.query_params.get(self.expand_query_param)
+        ))
+        unknown = sorted(expanded - set(self.expand_choices))
+        if unknown:
+            raise ValidationError({
+                self.expand_query_param: [
+                    f"Неизвестные связи: {', '.join(unknown)}."
+                ]
+            })
+        if "reviews.comments" in expanded:
+            expanded.add("reviews")
+        return expanded
+
+    def prefetch_latest(self, queryset):
+        """Последние отзывы всех произведений страницы одним запросом,
+        и последние комментарии всех этих отзывов - еще одним."""
+        reviews = Review.objects.latest_per_parent(
+            "title_id", settings.EXPAND_REVIEWS_LIMIT
+        ).select_related("author")
+        queryset = queryset.prefetch_related(
+            Prefetch("reviews", queryset=reviews, to_attr="latest_reviews")
+        )
+        if "reviews.comments" not in self.expanded:
+            return queryset
+        comments = Comments.objects.latest_per_parent(
+            "review_id", settings.EXPAND_COMMENTS_LIMIT
+        ).select_related("author")
+        return queryset.prefetch_related(Prefetch(
+            "latest_reviews__comments",
+            queryset=comments,
+            to_attr="latest_comments",
+        ))
+
+    def get_cache_resources(self):
+        """Ответ про одно произведение и список по `ids` зависят от
+        версий этих произведений, а не от записи в любое другое."""
+        if self.action == "retrieve":
+            return [(Title, self.kwargs[self.lookup_url_kwarg or "pk"])]
+        if self.ids_query_param in self.request.query_params:
+            return [
+                (Title, title_id) for title_id in self.get_requested_ids()
+            ]
+        return None
+
+    def get_cache_models(self):
+        if "reviews.comments" in self.expanded:
+            return self.cache_models + (User, Comments)
+        if "reviews" in self.expanded:
+            return self.cache_models + (User,)
+        return self.cache_models
+
     def get_serializer_class(self):
         serializer_classes = {
             "create": TitlePostSerializer,
             "update": TitlePostSerializer,
             "partial_update": TitlePostSerializer,
         }
+        if "reviews.comments" in self.expanded:
+            return TitleWithCommentsSerializer
+        if "reviews" in self.expanded:
+            return TitleWithReviewsSerializer
         default_serializer = TitleGetSerializer
         return serializer_classes.get(self.action, default_serializer)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    CachedListMixin,
+    CachedRetrieveMixin,
+    AuthorSparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет отзывов."""
+    cache_models = (Title, Review, User)
+    parent_field = "title_id"
     http_method_names = ["get", "post", "patch", "delete"]
     serializer_class = ReviewSerializer
     permission_classes = (IsRedactor,)
+    pagination_class = OptionalCursorPagination
 
-    def get_title_id(self):
-        title_id = self.kwargs.get("title_id")
-        return get_object_or_404(Title, id=title_id)
+    def get_cache_resources(self):
+        return [(Title, self.kwargs.get("title_id"))]
+
+    @cached_property
+    def title(self):
+        """Произведение из URL, один запрос на весь запрос клиента."""
+        return get_object_or_404(Title, id=self.kwargs.get("title_id"))
 
     def get_queryset(self):
-        return self.get_title_id().reviews.all()
+        return self.prune_queryset(self.title.reviews.all())
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title_id())
+        serializer.save(
+            author=get_user_model_instance(self.request.user),
+            title=self.title,
+        )
 
 
-class CommentsViewSet(viewsets.ModelViewSet):
+class CommentsViewSet(
+    CachedListMixin,
+    CachedRetrieveMixin,
+    AuthorSparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет комментариев."""
+    cache_models = (Review, Comments, User)
+    parent_field = "review_id"
     http_method_names = ["get", "post", "patch", "delete"]
     serializer_class = CommentsSerializer
     permission_classes = (IsRedactor,)
-
-    def get_review_id(self):
-        review_id = self.kwargs.get("review_id")
-        return get_object_or_404(Review, id=review_id)
+    pagination_class = OptionalCursorPagination
+
+    def get_cache_resources(self):
+        return [(Review, self.kwargs.get("review_id"))]
+
+    @cached_property
+    def review(self):
+        """Отзыв из URL. Принадлежность отзыва произведению проверяется
+        тем же запросом: для чужого title_id вернется 404."""
+        return get_object_or_404(
+            Review,
+            id=self.kwargs.get("review_id"),
+            title_id=self.kwargs.get("title_id"),
+        )
 
     def get_queryset(self):
-        return self.get_review_id().comments.all()
+        return self.prune_queryset(self.review.comments.all())
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review_id())
+        serializer.save(
+            author=get_user_model_instance(self.request.user),
+            review=self.review,
+        )
@@ -121,6 +121,52 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 DEFAULT_FROM_EMAIL = "admin@admin.ru"
 
+# Очередь писем (users.EmailOutbox) и команда send_emails: сколько писем
+# отправляется за одну пачку, сколько раз пытаться отправить письмо и
+# задержка перед повтором в секундах, удваивается с каждой попыткой.
+# Отправленные и неотправляемые письма хранятся RETENTION_DAYS дней.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_RETENTION_DAYS = 7
+
+# Время жизни кеша количества объектов в пагинации, секунды.
+# При нескольких процессах нужен общий бэкенд кеша (CACHES).
+COUNT_CACHE_TIMEOUT = 60
+
+# Время жизни кеша версии токенов пользователя, секунды. После смены
+# роли отозванный токен в других процессах принимается не дольше этого.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
+# LRU-кеш пользователей в памяти процесса: число записей и их время
+# жизни, секунды. Изменения пользователя в других процессах видны
+# не позже USER_CACHE_TIMEOUT.
+USER_CACHE_MAXSIZE = 1024
+USER_CACHE_TIMEOUT = 60
+
+# Кеш ответов на анонимные GET-запросы: алиас бэкенда из CACHES
+# (память процесса, файлы, Redis) и время жизни ответа, секунды.
+# При нескольких процессах нужен общий бэкенд, иначе запись в одном
+# процессе не сбросит кеш в остальных.
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Сколько последних отзывов произведения и комментариев к отзыву
+# встраивается в ответ с параметром `expand`.
+EXPAND_REVIEWS_LIMIT = 5
+EXPAND_COMMENTS_LIMIT = 3
+
+# Сколько произведений можно запросить одним `GET /titles/?ids=`.
+MULTI_GET_LIMIT = 300
+
+# Сколько произведений можно передать в `POST /titles/bulk/`.
+BULK_TITLES_LIMIT = 1000
+
+# Массовая модерация: сколько id можно передать и сколько объектов
+# удаляется одной транзакцией.
+MODERATION_IDS_LIMIT = 1000
+MODERATION_BATCH_SIZE = 500
+
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
@@ -128,7 +174,16 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.StatelessJWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
 }
 
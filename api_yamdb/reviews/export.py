@@ -0,0 +1,168 @@
+"""Потоковая выгрузка данных в CSV и NDJSON.
+
+Колонки CSV совпадают с файлами, которые читает load_csv_data, поэтому
+выгрузку можно загрузить обратно. Строки читаются через
+QuerySet.iterator(chunk_size=...), и память не зависит от размера таблиц.
+"""
+import csv
+import json
+from itertools import islice
+
+from reviews.models import Comments, Review
+from titles.models import Category, Genre, Title
+from users.models import User
+
+CHUNK_SIZE = 2000
+FORMATS = ("csv", "ndjson")
+
+
+def format_date(value):
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def iter_plain(queryset, columns, chunk_size):
+    for row in queryset.values_list(*columns).iterator(chunk_size):
+        yield dict(zip(columns, row))
+
+
+def iter_titles(chunk_size):
+    """Произведения с жанрами и рейтингом. Жанры запрашиваются одним
+    запросом на пачку произведений, а не на каждое."""
+    rows = Title.objects.order_by("id").values_list(
+        "id", "name", "year", "category_id", "description",
+        "rating_sum", "rating_count",
+    ).iterator(chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        genres = {}
+        for title_id, slug in Title.genre.through.objects.filter(
+            title_id__in=[row[0] for row in chunk]
+        ).order_by("genre__slug").values_list("title_id", "genre__slug"):
+            genres.setdefault(title_id, []).append(slug)
+        for (title_id, name, year, category_id, description,
+             rating_sum, rating_count) in chunk:
+            yield {
+                "id": title_id,
+                "name": name,
+                "year": year,
+                "category": category_id,
+                "description": description,
+                "genre": genres.get(title_id, []),
+                "rating": rating_sum / rating_count if rating_count else None,
+            }
+
+
+def iter_reviews(chunk_size):
+    rows = Review.objects.order_by("id").values_list(
+        "id", "title_id", "text", "author_id", "score", "pub_date"
+    ).iterator(chunk_size)
+    for review_id, title_id, text, author_id, score, pub_date in rows:
+        yield {
+            "id": review_id,
+            "title_id": title_id,
+            "text": text,
+            "author": author_id,
+            "score": score,
+            "pub_date": format_date(pub_date),
+        }
+
+
+def iter_comments(chunk_size):
+    rows = Comments.objects.order_by("id").values_list(
+        "id", "review_id", "text", "author_id", "pub_date"
+    ).iterator(chunk_size)
+    for comment_id, review_id, text, author_id, pub_date in rows:
+        yield {
+            "id": comment_id,
+            "review_id": review_id,
+            "text": text,
+            "author": author_id,
+            "pub_date": format_date(pub_date),
+        }
+
+
+class Dataset:
+    """Набор данных для выгрузки: имя файла load_csv_data и колонки.
+    Строки берутся из rows, а если его нет - из таблицы model."""
+
+    def __init__(self, filename, columns, model=None, rows=None):
+        self.filename = filename
+        self.columns = columns
+        self.model = model
+        self.rows = rows
+
+    def iter_rows(self, chunk_size):
+        if self.rows is not None:
+            return self.rows(chunk_size)
+        return iter_plain(
+            self.model.objects.order_by("id"), self.columns, chunk_size
+        )
+
+    def get_filename(self, file_format):
+        return self.filename.replace(".csv", f".{file_format}")
+
+
+DATASETS = {
+    "categories": Dataset(
+        "category.csv", ("id", "name", "slug"), model=Category
+    ),
+    "genres": Dataset("genre.csv", ("id", "name", "slug"), model=Genre),
+    "titles": Dataset(
+        "titles.csv",
+        ("id", "name", "year", "category", "description", "genre", "rating"),
+        rows=iter_titles,
+    ),
+    "genre_titles": Dataset(
+        "genre_title.csv",
+        ("id", "title_id", "genre_id"),
+        model=Title.genre.through,
+    ),
+    "users": Dataset(
+        "users.csv",
+        ("id", "username", "email", "role", "bio", "first_name",
+         "last_name"),
+        model=User,
+    ),
+    "reviews": Dataset(
+        "review.csv",
+        ("id", "title_id", "text", "author", "score", "pub_date"),
+        rows=iter_reviews,
+    ),
+    "comments": Dataset(
+        "comments.csv",
+        ("id", "review_id", "text", "author", "pub_date"),
+        rows=iter_comments,
+    ),
+}
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, который возвращает
+    записанную строку вместо накопления в буфере."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(dataset, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(dataset.columns)
+    for row in dataset.iter_rows(chunk_size):
+        if isinstance(row.get("genre"), list):
+            row["genre"] = ",".join(row["genre"])
+        yield writer.writerow([row[column] for column in dataset.columns])
+
+
+def iter_ndjson(dataset, chunk_size=CHUNK_SIZE):
+    for row in dataset.iter_rows(chunk_size):
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def export_lines(name, file_format, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки набора данных в выбранном формате."""
+    dataset = DATASETS[name]
+    if file_format == "csv":
+        return iter_csv(dataset, chunk_size)
+    return iter_ndjson(dataset, chunk_size)
@@ -0,0 +1,56 @@
+import time
+from pathlib import Path
+
+from django.core.management import BaseCommand
+
+from reviews.export import CHUNK_SIZE, DATASETS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает данные в CSV или NDJSON. CSV-выгрузку можно загрузить "
+        "обратно: load_csv_data --data-dir <папка>."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            type=Path,
+            required=True,
+            help="Папка для файлов выгрузки.",
+        )
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument(
+            "--datasets",
+            nargs="+",
+            choices=tuple(DATASETS),
+            default=tuple(DATASETS),
+            help="Наборы данных для выгрузки, по умолчанию все.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Количество строк, читаемых из БД за один раз.",
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options["output_dir"]
+        file_format = options["format"]
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name in options["datasets"]:
+            path = output_dir / DATASETS[name].get_filename(file_format)
+            start = time.perf_counter()
+            rows = -1 if file_format == "csv" else 0
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                for line in export_lines(
+                    name, file_format, options["chunk_size"]
+                ):
+                    file.write(line)
+                    rows += 1
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{path.name}: выгружено {rows}, за {elapsed:.2f} с"
+                )
+            )
@@ -1,118 +1,460 @@
 import csv
+import os
+import pickle
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
 
-from django.core.management import BaseCommand
+import django
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
+from api.cache import invalidate_response_cache
+from api.pagination import invalidate_count_cache
 from reviews.models import Comments, Review
 from titles.models import Category, Genre, Title
 from users.models import User
 
+DATA_DIR = settings.BASE_DIR / "static" / "data"
+GenreTitle = Title.genre.through
+ROLES = {role for role, _ in User.ROLES}
+
+
+def parse_id(value):
+    return int(value) if value else None
+
+
+def parse_date(value):
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f"Некорректная дата: {value}")
+    return date
+
+
+def parse_category(row):
+    return {"id": int(row["id"]), "name": row["name"], "slug": row["slug"]}
+
+
+def parse_title(row):
+    values = {
+        "id": int(row["id"]),
+        "name": row["name"],
+        "year": int(row["year"]),
+        "category_id": parse_id(row["category"]),
+    }
+    if "description" in row:
+        values["description"] = row["description"] or None
+    return values
+
+
+def parse_genre_title(row):
+    return {
+        "id": int(row["id"]),
+        "title_id": int(row["title_id"]),
+        "genre_id": int(row["genre_id"]),
+    }
+
+
+def parse_user(row):
+    if row["role"] not in ROLES:
+        raise ValueError(f"Неизвестная роль: {row['role']}")
+    return {
+        "id": int(row["id"]),
+        "username": row["username"],
+        "email": row["email"],
+        "role": row["role"],
+        "bio": row["bio"],
+        "first_name": row["first_name"],
+        "last_name": row["last_name"],
+    }
+
+
+def parse_review(row):
+    score = int(row["score"])
+    if not 1 <= score <= 10:
+        raise ValueError(f"Оценка вне диапазона: {score}")
+    return {
+        "id": int(row["id"]),
+        "title_id": int(row["title_id"]),
+        "author_id": int(row["author"]),
+        "text": row["text"],
+        "score": score,
+        "pub_date": parse_date(row["pub_date"]),
+    }
+
+
+def parse_comment(row):
+    return {
+        "id": int(row["id"]),
+        "review_id": int(row["review_id"]),
+        "author_id": int(row["author"]),
+        "text": row["text"],
+        "pub_date": parse_date(row["pub_date"]),
+    }
+
+
+def update_title_ratings(reviews, replaced):
+    """bulk_create и bulk_update не вызывают Review.save, поэтому
+    рейтинг обновляется одним запросом на произведение: оценки
+    записанных отзывов добавляются, прежние значения - вычитаются."""
+    ratings = defaultdict(lambda: [0, 0])
+    for review in reviews:
+        ratings[review.title_id][0] += review.score
+        ratings[review.title_id][1] += 1
+    for old in replaced:
+        ratings[old["title_id"]][0] -= old["score"]
+        ratings[old["title_id"]][1] -= 1
+    for title_id, (score_sum, count) in ratings.items():
+        Title.objects.update_rating(title_id, score_sum, count)
+
+
+class CsvSource:
+    """CSV-файл и модель, в которую он загружается.
+    parse разбирает и проверяет строку без обращения к БД, поэтому
+    выполняется в отдельных процессах. references - внешние ключи:
+    по ним строится порядок загрузки и отбрасываются строки, которые
+    ссылаются на отсутствующие объекты. unique - уникальные поля
+    кроме id, для поиска конфликтов в режиме upsert. after_write
+    получает записанные объекты и прежние значения измененных строк."""
+
+    def __init__(self, name, filename, model, parse, references=None,
+                 unique=(), after_write=None):
+        self.name = name
+        self.filename = filename
+        self.model = model
+        self.parse = parse
+        self.references = references or {}
+        self.unique = unique
+        self.after_write = after_write
+
+    def has_references(self, values, known):
+        return all(
+            values[field] is None or values[field] in known[model]
+            for field, model in self.references.items()
+        )
+
+    def find_conflicts(self, rows):
+        """id строк, уникальные поля которых уже заняты другими
+        записями в БД или предыдущими строками той же пачки."""
+        conflicts = set()
+        for fields in self.unique:
+            lookup = Q()
+            for field in fields:
+                lookup &= Q(**{f"{field}__in": {row[field] for row in rows}})
+            taken = {
+                tuple(item[1:]): item[0]
+                for item in self.model.objects.filter(lookup).values_list(
+                    "id", *fields
+                )
+            }
+            for row in rows:
+                key = tuple(row[field] for field in fields)
+                owner = taken.setdefault(key, row["id"])
+                if owner != row["id"]:
+                    conflicts.add(row["id"])
+        return conflicts
+
+
+CSV_SOURCES = (
+    CsvSource(
+        "Category", "category.csv", Category, parse_category,
+        unique=(("slug",),),
+    ),
+    CsvSource(
+        "Genre", "genre.csv", Genre, parse_category, unique=(("slug",),),
+    ),
+    CsvSource(
+        "Title", "titles.csv", Title, parse_title,
+        references={"category_id": Category},
+    ),
+    CsvSource(
+        "GenreTitle", "genre_title.csv", GenreTitle, parse_genre_title,
+        references={"title_id": Title, "genre_id": Genre},
+        unique=(("title_id", "genre_id"),),
+    ),
+    CsvSource(
+        "User", "users.csv", User, parse_user,
+        unique=(("username",), ("email",)),
+    ),
+    CsvSource(
+        "Review", "review.csv", Review, parse_review,
+        references={"title_id": Title, "author_id": User},
+        unique=(("title_id", "author_id"),),
+        after_write=update_title_ratings,
+    ),
+    CsvSource(
+        "Comments", "comments.csv", Comments, parse_comment,
+        references={"review_id": Review, "author_id": User},
+    ),
+)
+SOURCES_BY_NAME = {source.name: source for source in CSV_SOURCES}
+
+
+def resolve_order(sources):
+    """Топологическая сортировка файлов по внешним ключам:
+    файл загружается после файлов моделей, на которые ссылается."""
+    by_model = {source.model: source for source in sources}
+    ordered = []
+    state = {}
+
+    def visit(source):
+        if state.get(source.name) == "done":
+            return
+        if state.get(source.name) == "visiting":
+            raise CommandError(f"Циклическая зависимость: {source.name}")
+        state[source.name] = "visiting"
+        for model in source.references.values():
+            if model in by_model:
+                visit(by_model[model])
+        state[source.name] = "done"
+        ordered.append(source)
+
+    for source in sources:
+        visit(source)
+    return ordered
+
+
+def read_chunks(path, chunk_size):
+    with open(path, encoding="utf-8", newline="") as csv_file:
+        reader = csv.DictReader(csv_file)
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def parse_chunks(source, path, chunk_size):
+    """Пачки разобранных строк и количество некорректных в каждой."""
+    for rows in read_chunks(path, chunk_size):
+        parsed = []
+        for row in rows:
+            try:
+                parsed.append(source.parse(row))
+            except (KeyError, TypeError, ValueError):
+                continue
+        yield parsed, len(rows) - len(parsed)
+
+
+def parse_to_spool(source_name, path, chunk_size, spool_dir):
+    """Выполняется в процессе пула: разбирает файл и складывает
+    пачки во временный файл, чтобы не держать весь CSV в памяти."""
+    source = SOURCES_BY_NAME[source_name]
+    spool_path = os.path.join(spool_dir, f"{source_name}.pickle")
+    with open(spool_path, "wb") as spool:
+        for chunk in parse_chunks(source, path, chunk_size):
+            pickle.dump(chunk, spool, protocol=pickle.HIGHEST_PROTOCOL)
+    return spool_path
+
+
+def read_spool(spool_path):
+    with open(spool_path, "rb") as spool:
+        while True:
+            try:
+                yield pickle.load(spool)
+            except EOFError:
+                return
+
+
+def create_objects(model, objs):
+    """bulk_create с датами из файла. bulk_create записывает в поля
+    с auto_now_add текущее время, поэтому даты из объектов
+    восстанавливаются одним bulk_update. Вызывается в транзакции."""
+    fields = [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    values = [[getattr(obj, name) for name in fields] for obj in objs]
+    model.objects.bulk_create(objs)
+    if not fields or not objs:
+        return
+    for obj, row in zip(objs, values):
+        for name, value in zip(fields, row):
+            setattr(obj, name, value)
+    model.objects.bulk_update(objs, fields)
+
 
 class Command(BaseCommand):
-    def handle(self, *args, **kwarg):
-        self.stdout.write(self.style.SUCCESS("Загружаем данные Category"))
-        with open("static/data/category.csv", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
-            n = 0
-            for row in reader:
-                Category(
-                    id=row[0],
-                    name=row[1],
-                    slug=row[2],
-                ).save()
-                n += 1
-                print(f"done {n}")
-
-        self.stdout.write(self.style.SUCCESS("Загружаем данные Genre"))
-        with open("static/data/genre.csv", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
-            n = 0
-            for row in reader:
-                Genre(
-                    id=row[0],
-                    name=row[1],
-                    slug=row[2],
-                ).save()
-                n += 1
-                print(f"done {n}")
-
-        self.stdout.write(self.style.SUCCESS("Загружаем данные Title"))
-        with open("static/data/titles.csv", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
-            n = 0
-            for row in reader:
-                category = Category.objects.get(id=row[3])
-                Title(
-                    id=row[0], name=row[1], year=row[2], category=category
-                ).save()
-                n += 1
-                print(f"done {n}")
-
-        self.stdout.write(self.style.SUCCESS("Загружаем данные GenreTitle"))
-        with open("static/data/genre_title.csv", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
-            n = 0
-            for row in reader:
-                title_id = Title.objects.get(id=row[1])
-                genre_id = Genre.objects.get(id=row[2])
-                genre_id.titles.add(title_id)
-                n += 1
-                print(f"done {n}")
-
-        self.stdout.write(self.style.SUCCESS("Загружаем данные User"))
-        with open("static/data/users.csv", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
-            n = 0
-            for row in reader:
-                User(
-                    id=row[0],
-                    username=row[1],
-                    first_name=row[5],
-                    last_name=row[6],
-                    email=row[2],
-                    role=row[3],
-                    bio=row[4],
-                ).save()
-                n += 1
-                print(f"done {n}")
-
-        self.stdout.write(self.style.SUCCESS("Загружаем данные Review"))
-        with open("static/data/review.csv", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
-            n = 0
-            for row in reader:
-                title = Title.objects.get(id=row[1])
-                author = User.objects.get(id=row[3])
-                Review(
-                    id=row[0],
-                    author=author,
-                    title_id=title.id,
-                    text=row[2],
-                    score=row[4],
-                    pub_date=row[5],
-                ).save()
-                n += 1
-                print(f"done {n}")
-
-        self.stdout.write(self.style.SUCCESS("Загружаем данные Comments"))
-        with open("static/data/comments.csv", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
-            n = 0
-            for row in reader:
-                review_id = Review.objects.get(id=row[1])
-                author = User.objects.get(id=row[3])
-                Comments.objects.create(
-                    id=row[0],
-                    author=author,
-                    review=review_id,
-                    text=row[2],
-                    pub_date=row[4],
-                ).save()
-                n += 1
-                print(f"done {n}")
+    help = (
+        "Загружает данные из CSV-файлов. Файлы разбираются параллельно "
+        "в пуле процессов, а записываются пачками через bulk_create "
+        "в порядке зависимостей. В режиме upsert строки сравниваются "
+        "с записями БД по id, и записываются только новые и измененные."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            choices=("insert", "upsert"),
+            default="insert",
+            help="insert - только добавление, upsert - добавление "
+                 "и обновление по id.",
+        )
+        parser.add_argument(
+            "--data-dir",
+            type=Path,
+            default=DATA_DIR,
+            help="Папка с CSV-файлами.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=min(len(CSV_SOURCES), os.cpu_count() or 1),
+            help="Количество процессов для разбора файлов, "
+                 "0 - разбирать в текущем процессе.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Количество строк, записываемых в одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        data_dir = options["data_dir"]
+        chunk_size = options["chunk_size"]
+        sources = resolve_order(CSV_SOURCES)
+        for source in sources:
+            if not (data_dir / source.filename).is_file():
+                raise CommandError(
+                    f"Не найден файл {data_dir / source.filename}"
+                )
+
+        known = {
+            model: set(model.objects.values_list("id", flat=True))
+            for source in sources
+            for model in source.references.values()
+        }
+        if options["workers"] > 0:
+            with tempfile.TemporaryDirectory() as spool_dir:
+                with ProcessPoolExecutor(
+                    max_workers=options["workers"], initializer=django.setup
+                ) as executor:
+                    futures = {
+                        source.name: executor.submit(
+                            parse_to_spool,
+                            source.name,
+                            str(data_dir / source.filename),
+                            chunk_size,
+                            spool_dir,
+                        )
+                        for source in sources
+                    }
+                    for source in sources:
+                        spool_path = futures[source.name].result()
+                        self.load_source(
+                            source, read_spool(spool_path), known, options
+                        )
+        else:
+            for source in sources:
+                chunks = parse_chunks(
+                    source, data_dir / source.filename, chunk_size
+                )
+                self.load_source(source, chunks, known, options)
+
+        for model in (Title, Review, Comments):
+            invalidate_count_cache(model)
+        invalidate_response_cache(
+            Category, Genre, Title, User, Review, Comments
+        )
+
+    def load_source(self, source, chunks, known, options):
+        self.stdout.write(
+            self.style.SUCCESS(f"Загружаем данные {source.name}")
+        )
+        start = time.perf_counter()
+        stats = Counter()
+        for rows, invalid in chunks:
+            stats["invalid"] += invalid
+            valid = [
+                row for row in rows if source.has_references(row, known)
+            ]
+            stats["skipped"] += len(rows) - len(valid)
+            if options["mode"] == "upsert":
+                ids = self.upsert_chunk(source, valid, stats)
+            else:
+                ids = self.insert_chunk(source, valid, stats)
+            if source.model in known:
+                known[source.model].update(ids)
+
+        elapsed = time.perf_counter() - start
+        processed = sum(
+            stats[key] for key in ("inserted", "updated", "unchanged")
+        )
+        rate = processed / elapsed if elapsed else processed
+        self.stdout.write(
+            f"{source.filename}: добавлено {stats['inserted']}, "
+            f"обновлено {stats['updated']}, "
+            f"без изменений {stats['unchanged']}, "
+            f"за {elapsed:.2f} с, {rate:.0f} строк/с"
+        )
+        warnings = (
+            ("skipped", "пропущено строк без связанных объектов"),
+            ("invalid", "пропущено некорректных строк"),
+            ("conflicts", "пропущено строк с занятыми уникальными полями"),
+        )
+        for key, message in warnings:
+            if stats[key]:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"{source.filename}: {message}: {stats[key]}"
+                    )
+                )
+
+    def insert_chunk(self, source, rows, stats):
+        objs = [source.model(**row) for row in rows]
+        with transaction.atomic():
+            create_objects(source.model, objs)
+            if source.after_write is not None:
+                source.after_write(objs, ())
+        stats["inserted"] += len(objs)
+        return [row["id"] for row in rows]
+
+    def upsert_chunk(self, source, rows, stats):
+        """Сравнивает пачку с записями БД по id одним запросом и
+        записывает только новые и измененные строки. Возвращает id
+        строк, которые после записи есть в БД."""
+        if not rows:
+            return []
+        fields = [field for field in rows[0] if field != "id"]
+        existing = {
+            item["id"]: item
+            for item in source.model.objects.filter(
+                id__in=[row["id"] for row in rows]
+            ).values("id", *fields)
+        }
+        created, changed = [], []
+        for row in rows:
+            if row["id"] not in existing:
+                created.append(row)
+            elif row != existing[row["id"]]:
+                changed.append(row)
+            else:
+                stats["unchanged"] += 1
+
+        conflicts = source.find_conflicts(created + changed)
+        if conflicts:
+            stats["conflicts"] += len(conflicts)
+            created = [row for row in created if row["id"] not in conflicts]
+            changed = [row for row in changed if row["id"] not in conflicts]
+
+        new_objs = [source.model(**row) for row in created]
+        changed_objs = [source.model(**row) for row in changed]
+        with transaction.atomic():
+            create_objects(source.model, new_objs)
+            if changed_objs:
+                source.model.objects.bulk_update(changed_objs, fields)
+            if source.after_write is not None:
+                source.after_write(
+                    new_objs + changed_objs,
+                    [existing[row["id"]] for row in changed],
+                )
+        stats["inserted"] += len(new_objs)
+        stats["updated"] += len(changed_objs)
+        return [row["id"] for row in rows if row["id"] not in conflicts]
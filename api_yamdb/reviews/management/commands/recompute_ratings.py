@@ -0,0 +1,71 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from titles.models import Title
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сумму и количество оценок произведений."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество произведений в одном запросе обновления.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать расхождения, ничего не сохранять.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        drifted = (
+            Title.objects.annotate(
+                actual_sum=Coalesce(Sum("reviews__score"), 0),
+                actual_count=Count("reviews"),
+            )
+            .filter(
+                ~Q(rating_sum=F("actual_sum"))
+                | ~Q(rating_count=F("actual_count"))
+            )
+            .order_by("pk")
+        )
+
+        batch = []
+        total = 0
+        for title in drifted.iterator(chunk_size=batch_size):
+            self.stdout.write(
+                f"Произведение {title.pk}: "
+                f"сумма {title.rating_sum} -> {title.actual_sum}, "
+                f"количество {title.rating_count} -> {title.actual_count}"
+            )
+            title.rating_sum = title.actual_sum
+            title.rating_count = title.actual_count
+            batch.append(title)
+            total += 1
+            if len(batch) >= batch_size:
+                self.save_batch(batch, options["dry_run"])
+                batch = []
+        self.save_batch(batch, options["dry_run"])
+
+        if not total:
+            self.stdout.write(self.style.SUCCESS("Расхождений не найдено"))
+        elif options["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(f"Найдено расхождений: {total}")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Исправлено произведений: {total}")
+            )
+
+    def save_batch(self, titles, dry_run):
+        if dry_run or not titles:
+            return
+        with transaction.atomic():
+            Title.objects.bulk_update(titles, ("rating_sum", "rating_count"))
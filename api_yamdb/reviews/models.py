@@ -1,9 +1,108 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 
 from titles.models import Title
 from users.models import User
 
+# Отправляется после удаления отзывов или комментариев пачками:
+# такое удаление не загружает объекты и не отправляет post_delete.
+publications_deleted = Signal()
+
+
+def raw_delete(queryset):
+    """Удаляет строки queryset одним DELETE без загрузки объектов.
+
+    QuerySet.delete() загружает каждый объект, если на модель подписаны
+    обработчики post_delete (рейтинг в reviews.signals, кеш в
+    api.signals), и вызывает их для каждой строки. Для пачки отзывов
+    это по UPDATE рейтинга и сбросу кеша на каждый отзыв. Поэтому здесь
+    используется приватный QuerySet._raw_delete: каскады и сигналы не
+    выполняются, комментарии удаляются отдельно, рейтинг пересчитывается
+    один раз, а кеш сбрасывается сигналом publications_deleted.
+    При обновлении Django метод нужно проверить первым."""
+    return queryset._raw_delete(queryset.db)
+
+
+class PublicationQuerySet(models.QuerySet):
+    """Запросы к отзывам и комментариям."""
+
+    def delete_in_batches(self, batch_size):
+        """Удаляет выбранные объекты пачками по batch_size, каждую -
+        в своей транзакции и без загрузки объектов в память.
+        Рейтинг затронутых произведений пересчитывается один раз после
+        всех пачек, в том числе если удаление прервалось.
+        Возвращает количество удаленных объектов."""
+        ids = self.order_by("pk").values_list("pk", flat=True)
+        queryset = self.model.objects.using(self.db)
+        deleted = 0
+        title_ids = set()
+        try:
+            while True:
+                with transaction.atomic(using=self.db):
+                    batch = list(ids[:batch_size])
+                    if batch:
+                        title_ids |= queryset.get_rated_title_ids(batch)
+                        deleted += queryset.delete_batch(batch)
+                if len(batch) < batch_size:
+                    break
+        finally:
+            if deleted:
+                queryset.recompute_ratings(title_ids)
+                publications_deleted.send(sender=self.model)
+        return deleted
+
+    def delete_batch(self, ids):
+        """Удаляет объекты с переданными id одним запросом."""
+        return raw_delete(self.filter(pk__in=ids))
+
+    def get_rated_title_ids(self, ids):
+        """Id произведений, рейтинг которых зависит от объектов.
+        Комментарии на рейтинг не влияют."""
+        return set()
+
+    def recompute_ratings(self, title_ids):
+        """Пересчитывает рейтинг произведений. У комментариев нет оценок."""
+
+    def latest_per_parent(self, parent_field, limit):
+        """Не больше limit последних объектов для каждого родителя одним
+        запросом. Окно задается коррелированным подзапросом с LIMIT:
+        Django 3.2 не умеет фильтровать по оконным функциям."""
+        ordering = ("-pub_date", "-id")
+        latest = self.model.objects.filter(
+            **{parent_field: OuterRef(parent_field)}
+        ).order_by(*ordering).values("id")[:limit]
+        return self.filter(id__in=Subquery(latest)).order_by(*ordering)
+
+
+class ReviewQuerySet(PublicationQuerySet):
+    """Запросы к отзывам."""
+
+    def delete_batch(self, ids):
+        """Вместе с отзывами удаляет их комментарии."""
+        raw_delete(Comments.objects.using(self.db).filter(review_id__in=ids))
+        return super().delete_batch(ids)
+
+    def get_rated_title_ids(self, ids):
+        return set(
+            self.filter(pk__in=ids).values_list("title_id", flat=True)
+        )
+
+    def recompute_ratings(self, title_ids):
+        """Пересчитывает сумму и количество оценок произведений по
+        таблице отзывов одним запросом."""
+        scores = self.model.objects.using(self.db).filter(
+            title_id=OuterRef("pk")
+        ).order_by().values("title_id").annotate(
+            score_sum=Sum("score"), score_count=Count("id")
+        )
+        return Title.objects.using(self.db).filter(pk__in=title_ids).update(
+            rating_sum=Coalesce(Subquery(scores.values("score_sum")), 0),
+            rating_count=Coalesce(Subquery(scores.values("score_count")), 0),
+        )
+
 
 class Review(models.Model):
     author = models.ForeignKey(
@@ -27,6 +126,8 @@ class Review(models.Model):
         "Дата добавления", auto_now_add=True, db_index=True
     )
 
+    objects = ReviewQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
@@ -37,6 +138,54 @@ class Review(models.Model):
             ),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._rating_state = (loaded.get("title_id"), loaded.get("score"))
+        return instance
+
+    def get_stored_rating_state(self):
+        """(title_id, score) строки в БД или None, если строки нет.
+        Без запроса, если объект загружен из БД вместе с этими полями;
+        иначе, например после .only() или для Review(pk=...), значения
+        читаются одним запросом."""
+        if self._state.adding and self.pk is None:
+            return None
+        state = getattr(self, "_rating_state", (None, None))
+        if not self._state.adding and None not in state:
+            return state
+        return type(self).objects.filter(pk=self.pk).values_list(
+            "title_id", "score"
+        ).first()
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и в той же транзакции обновляет
+        сумму и количество оценок произведения."""
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic():
+            stored = self.get_stored_rating_state()
+            super().save(*args, **kwargs)
+            title_id, score = self.title_id, self.score
+            if stored is None:
+                Title.objects.update_rating(title_id, score, 1)
+            else:
+                old_title_id, old_score = stored
+                # Поля, не попавшие в update_fields, в БД не изменились.
+                if update_fields is not None:
+                    if not {"title", "title_id"} & set(update_fields):
+                        title_id = old_title_id
+                    if "score" not in update_fields:
+                        score = old_score
+                if old_title_id == title_id:
+                    Title.objects.update_rating(
+                        title_id, score - old_score, 0
+                    )
+                else:
+                    Title.objects.update_rating(old_title_id, -old_score, -1)
+                    Title.objects.update_rating(title_id, score, 1)
+        self._rating_state = (title_id, score)
+
 
 class Comments(models.Model):
     author = models.ForeignKey(
@@ -56,6 +205,8 @@ class Comments(models.Model):
         "Дата добавления", auto_now_add=True, db_index=True
     )
 
+    objects = PublicationQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from reviews.models import Review
+from titles.models import Title
+
+
+@receiver(post_delete, sender=Review)
+def decrease_title_rating(sender, instance, **kwargs):
+    """Убирает оценку удаленного отзыва из рейтинга произведения.
+    Сигнал отправляется внутри транзакции удаления, в том числе
+    при каскадном удалении."""
+    Title.objects.update_rating(instance.title_id, -instance.score, -1)
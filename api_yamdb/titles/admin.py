@@ -30,4 +30,5 @@ class TitleAdmin(admin.ModelAdmin):
     list_display = ("id", "category", "name", "year", "description")
     search_fields = ("name",)
     list_filter = ("year", "category", "genre")
+    readonly_fields = ("rating_sum", "rating_count")
     empty_value_display = "-пусто-"
@@ -0,0 +1,76 @@
+import random
+import string
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from titles.models import Title
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск произведений через FTS5 с фильтром name contains "
+        "на синтетических данных. Данные удаляются после замера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=1_000_000)
+        parser.add_argument("--words", type=int, default=20_000)
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--page-size", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        vocabulary = [
+            "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 9)))
+            for _ in range(options["words"])
+        ]
+        with transaction.atomic():
+            self.fill(rnd, vocabulary, options)
+            words = rnd.sample(vocabulary, options["queries"])
+            old = self.measure(
+                lambda word: Title.objects.filter(name__contains=word),
+                words,
+                options["page_size"],
+            )
+            new = self.measure(
+                lambda word: Title.objects.search(word),
+                words,
+                options["page_size"],
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"name contains: {old * 1000:.2f} мс на запрос")
+        self.stdout.write(f"search (FTS5): {new * 1000:.2f} мс на запрос")
+        self.stdout.write(self.style.SUCCESS(f"Ускорение: {old / new:.1f}x"))
+
+    def fill(self, rnd, vocabulary, options):
+        total = options["titles"]
+        batch_size = options["batch_size"]
+        start = time.perf_counter()
+        for offset in range(0, total, batch_size):
+            Title.objects.bulk_create(
+                Title(
+                    name=" ".join(rnd.choices(vocabulary, k=3)),
+                    year=rnd.randint(1900, 2020),
+                    description=" ".join(rnd.choices(vocabulary, k=12)),
+                )
+                for _ in range(min(batch_size, total - offset))
+            )
+        self.stdout.write(
+            f"Создано произведений: {total} "
+            f"за {time.perf_counter() - start:.1f} с"
+        )
+
+    def measure(self, make_queryset, words, page_size):
+        """Среднее время запроса так, как его выполняет список
+        произведений: количество и первая страница."""
+        start = time.perf_counter()
+        for word in words:
+            queryset = make_queryset(word)
+            queryset.count()
+            list(queryset[:page_size])
+        return (time.perf_counter() - start) / len(words)
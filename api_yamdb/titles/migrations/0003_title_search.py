@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 04:29
+
+from django.db import migrations
+
+import titles.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('titles', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            titles.search.create_search_index,
+            titles.search.drop_search_index,
+        ),
+    ]
@@ -1,7 +1,16 @@
-from django.db import models
+from django.db import connections, models
+from django.db.models import ExpressionWrapper, F, FloatField, Q
+from django.db.models.functions import NullIf
+from django.dispatch import Signal
 
+from titles.search import FTS_TABLE, RANK_SQL, build_match_query
 from titles.validators import year_validator
 
+# Отправляется после изменения произведений запросом в обход save():
+# bulk_create, bulk_update и update не отправляют post_save. ids -
+# id измененных произведений, None - если они неизвестны.
+titles_changed = Signal()
+
 
 class Category(models.Model):
     name = models.CharField("Название категории", max_length=256)
@@ -31,6 +40,86 @@ class Genre(models.Model):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+    """Запросы к произведениям."""
+
+    def with_rating(self):
+        """Добавляет рейтинг, посчитанный по сохраненным сумме и количеству
+        оценок, без обращения к таблице отзывов."""
+        return self.annotate(
+            rating=ExpressionWrapper(
+                F("rating_sum") * 1.0 / NullIf(F("rating_count"), 0),
+                output_field=FloatField(),
+            )
+        )
+
+    def search(self, text):
+        """Полнотекстовый поиск по названию и описанию.
+        На SQLite результаты отсортированы по релевантности (FTS5, bm25),
+        на других СУБД - по названию."""
+        if connections[self.db].vendor != "sqlite":
+            return self.filter(
+                Q(name__icontains=text) | Q(description__icontains=text)
+            ).order_by("name")
+        match = build_match_query(text)
+        if not match:
+            return self.none()
+        return self.extra(
+            select={"search_rank": RANK_SQL},
+            tables=[FTS_TABLE],
+            where=[
+                f"{FTS_TABLE}.rowid = {self.model._meta.db_table}.id",
+                f"{FTS_TABLE} MATCH %s",
+            ],
+            params=[match],
+            order_by=["search_rank"],
+        )
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        titles_changed.send(sender=self.model)
+        return objs
+
+    def bulk_create_with_pk(self, objs, batch_size=None):
+        """bulk_create, после которого у объектов есть id и на СУБД без
+        RETURNING для вставки нескольких строк (SQLite в Django 3.2).
+        Вызывается в транзакции: первая вставка держит блокировку записи
+        SQLite до коммита, поэтому новые строки - последние в таблице."""
+        objs = self.bulk_create(objs, batch_size=batch_size)
+        features = connections[self.db].features
+        if not objs or features.can_return_rows_from_bulk_insert:
+            return objs
+        pks = self.order_by("-pk").values_list("pk", flat=True)[:len(objs)]
+        for obj, pk in zip(objs, reversed(list(pks))):
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = self.db
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        rows = super().bulk_update(*args, **kwargs)
+        titles_changed.send(sender=self.model)
+        return rows
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        titles_changed.send(sender=self.model)
+        return rows
+
+    def update_rating(self, title_id, score_delta, count_delta):
+        """Атомарно изменяет сумму и количество оценок произведения.
+        titles_changed сообщает id произведения: кеш остальных
+        произведений остается действительным."""
+        if not score_delta and not count_delta:
+            return 0
+        rows = super(TitleQuerySet, self.filter(pk=title_id)).update(
+            rating_sum=F("rating_sum") + score_delta,
+            rating_count=F("rating_count") + count_delta,
+        )
+        titles_changed.send(sender=self.model, ids=[title_id])
+        return rows
+
+
 class Title(models.Model):
     name = models.CharField(
         "Название произведения", max_length=256, db_index=True
@@ -51,10 +140,17 @@ class Title(models.Model):
         blank=False,
         related_name="titles",
     )
+    rating_sum = models.PositiveIntegerField("Сумма оценок", default=0)
+    rating_count = models.PositiveIntegerField(
+        "Количество оценок", default=0
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
+        indexes = [models.Index(fields=["year"], name="title_year_idx")]
 
     def __str__(self):
         return self.name
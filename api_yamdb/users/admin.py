@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from users.models import User
+from users.models import EmailOutbox, User
 
 
 @admin.register(User)
@@ -16,3 +16,17 @@ class UserAdmin(admin.ModelAdmin):
     list_editable = ("role",)
     search_fields = ("username",)
     empty_value_display = "-пусто-"
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "recipient",
+        "subject",
+        "created_at",
+        "attempts",
+        "sent_at",
+    )
+    list_filter = ("sent_at",)
+    search_fields = ("recipient",)
+    empty_value_display = "-пусто-"
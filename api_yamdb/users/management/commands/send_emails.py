@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management import BaseCommand
+
+from users.outbox import (claim_batch, purge_finished, record_failures,
+                          send_batch)
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет письма из очереди пачками через одно соединение "
+        "с почтовым сервером. Неотправленные письма повторяются позже."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Не завершаться, а проверять очередь каждые --interval "
+                 "секунд.",
+        )
+        parser.add_argument("--interval", type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                purge_finished()
+                sent, failed = self.drain(options["batch_size"])
+            except Exception as error:
+                if not options["loop"]:
+                    raise
+                self.stderr.write(f"Ошибка соединения: {error}")
+            else:
+                if sent or failed or not options["loop"]:
+                    self.stdout.write(
+                        f"Отправлено писем: {sent}, с ошибкой: {failed}"
+                    )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def drain(self, batch_size):
+        """Отправляет пачки, пока в очереди есть готовые письма.
+        Соединение открывается, только если есть что отправлять, и
+        закрывается, когда очередь пуста: сервер не держит простаивающее
+        соединение."""
+        messages = claim_batch(batch_size)
+        if not messages:
+            return 0, 0
+        total_sent = total_failed = 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            # Захваченные письма не отправлены: попытка засчитывается,
+            # иначе при недоступном сервере они повторялись бы бесконечно.
+            record_failures(messages, error)
+            raise
+        try:
+            while messages:
+                sent, failed = send_batch(connection, messages)
+                total_sent += sent
+                total_failed += failed
+                messages = claim_batch(batch_size)
+        finally:
+            connection.close()
+        return total_sent, total_failed
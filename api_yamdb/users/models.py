@@ -23,6 +23,16 @@ class User(AbstractUser):
     )
     bio = models.TextField(verbose_name="Биография", blank=True)
     updated_at = models.DateTimeField(default=timezone.now)
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Версия токенов",
+        help_text="Увеличивается при смене прав и отзывает выданные токены.",
+    )
+
+    # Поля, которые записываются в токен доступа. Их изменение
+    # делает выданные токены недействительными.
+    TOKEN_FIELDS = ("role", "is_staff", "is_superuser", "is_active")
 
     @property
     def is_user(self):
@@ -35,3 +45,77 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == self.ROLES[2][0]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._token_state = {
+            field: loaded[field]
+            for field in cls.TOKEN_FIELDS if field in loaded
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        """При смене роли или прав увеличивает версию токенов."""
+        token_state = getattr(self, "_token_state", {})
+        if any(
+            getattr(self, field) != value
+            for field, value in token_state.items()
+        ):
+            self.token_version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
+        self._token_state = {
+            field: getattr(self, field) for field in self.TOKEN_FIELDS
+        }
+
+
+class EmailOutboxQuerySet(models.QuerySet):
+    """Запросы к очереди писем."""
+
+    def enqueue(self, recipient, subject, body):
+        """Ставит письмо в очередь. Вызывается в транзакции, которая
+        меняет данные, поэтому письмо уходит, только если она
+        зафиксирована."""
+        return self.create(recipient=recipient, subject=subject, body=body)
+
+    def pending(self, max_attempts):
+        """Неотправленные письма, время попытки которых наступило."""
+        return self.filter(
+            sent_at__isnull=True,
+            attempts__lt=max_attempts,
+            next_attempt_at__lte=timezone.now(),
+        )
+
+
+class EmailOutbox(models.Model):
+    """Очередь исходящих писем. Письма отправляет команда send_emails."""
+    recipient = models.EmailField("Получатель", max_length=254)
+    subject = models.CharField("Тема", max_length=255)
+    body = models.TextField("Текст")
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        "Следующая попытка", default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    sent_at = models.DateTimeField("Отправлено", null=True, blank=True)
+
+    objects = EmailOutboxQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+        ordering = ("id",)
+        indexes = [
+            models.Index(
+                fields=["sent_at", "next_attempt_at"],
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
@@ -0,0 +1,115 @@
+"""Отправка писем из очереди EmailOutbox.
+
+Пачка писем сначала захватывается: время следующей попытки сдвигается
+на EMAIL_OUTBOX_RETRY_DELAY, и параллельный обработчик ее не возьмет.
+Если обработчик упадет во время отправки, письма вернутся в очередь
+после этой задержки. Письма пачки отправляются через одно соединение.
+Текст отправленного письма стирается, а сами записи удаляются через
+EMAIL_OUTBOX_RETENTION_DAYS дней.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from users.models import EmailOutbox
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой, удваивается с каждой."""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_batch(batch_size):
+    """Захватывает и возвращает до batch_size писем, готовых к отправке."""
+    with transaction.atomic():
+        messages = list(
+            EmailOutbox.objects.pending(settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        EmailOutbox.objects.filter(
+            id__in=[message.id for message in messages]
+        ).update(next_attempt_at=timezone.now() + retry_delay(1))
+    return messages
+
+
+def send_batch(connection, messages):
+    """Отправляет письма через открытое соединение и записывает
+    результат. Ошибка письма не прерывает пачку: соединение
+    переоткрывается, письмо получает новую попытку позже.
+    Возвращает количество отправленных и неотправленных писем."""
+    sent, failed = [], []
+    for message in messages:
+        email = EmailMessage(
+            message.subject,
+            message.body,
+            settings.DEFAULT_FROM_EMAIL,
+            [message.recipient],
+            connection=connection,
+        )
+        try:
+            email.send()
+        except Exception as error:
+            message.last_error = format_error(error)
+            failed.append(message)
+            reopen(connection)
+        else:
+            sent.append(message.id)
+
+    # Текст с кодом подтверждения не хранится после отправки.
+    EmailOutbox.objects.filter(id__in=sent).update(
+        sent_at=timezone.now(), attempts=F("attempts") + 1,
+        last_error="", body="",
+    )
+    record_failures(failed)
+    return len(sent), len(failed)
+
+
+def format_error(error):
+    return f"{type(error).__name__}: {error}"
+
+
+def record_failures(messages, error=None):
+    """Засчитывает попытку неотправленным письмам и откладывает
+    следующую. Текст письма, у которого закончились попытки, стирается:
+    оно больше не будет отправлено."""
+    now = timezone.now()
+    for message in messages:
+        if error is not None:
+            message.last_error = format_error(error)
+        message.attempts += 1
+        message.next_attempt_at = now + retry_delay(message.attempts)
+        if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            message.body = ""
+    EmailOutbox.objects.bulk_update(
+        messages, ["attempts", "next_attempt_at", "last_error", "body"]
+    )
+
+
+def purge_finished():
+    """Удаляет отправленные письма и письма без оставшихся попыток,
+    созданные раньше EMAIL_OUTBOX_RETENTION_DAYS дней назад."""
+    created_before = timezone.now() - timedelta(
+        days=settings.EMAIL_OUTBOX_RETENTION_DAYS
+    )
+    deleted, _ = EmailOutbox.objects.filter(
+        Q(sent_at__isnull=False)
+        | Q(attempts__gte=settings.EMAIL_OUTBOX_MAX_ATTEMPTS),
+        created_at__lt=created_before,
+    ).delete()
+    return deleted
+
+
+def reopen(connection):
+    """Закрывает соединение после ошибки и пробует открыть заново.
+    Если открыть не удалось, бэкенд откроет его при следующей отправке."""
+    try:
+        connection.close()
+        connection.open()
+    except Exception:
+        pass
@@ -0,0 +1,23 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def assert_no_n_plus_one():
+    """Проверяет, что число запросов к БД не растет вместе с количеством
+    объектов в ответе: запрос выполняется до и после добавления
+    объектов, и второй раз запросов должно быть не больше."""
+    def check(make_request, add_objects, extra=4):
+        with CaptureQueriesContext(connection) as before:
+            make_request()
+        add_objects(extra)
+        with CaptureQueriesContext(connection) as after:
+            make_request()
+        assert len(after) <= len(before), (
+            f'Количество запросов к БД выросло с {len(before)} до '
+            f'{len(after)} после добавления {extra} объектов - вероятно, '
+            'связанные объекты загружаются по одному (N+1).\n'
+            + '\n'.join(query['sql'] for query in after.captured_queries)
+        )
+    return check
@@ -0,0 +1,39 @@
+import pytest
+
+from titles.models import Category, Genre, Title
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='films')
+
+
+@pytest.fixture
+def other_category():
+    return Category.objects.create(name='Книги', slug='books')
+
+
+@pytest.fixture
+def genre():
+    return Genre.objects.create(name='Ужасы', slug='horror')
+
+
+@pytest.fixture
+def other_genre():
+    return Genre.objects.create(name='Драма', slug='drama')
+
+
+@pytest.fixture
+def create_titles(category, genre):
+    """Создает произведения «Произведение N» в категории `category`.
+    Жанры - `genre` или переданный список."""
+    def create(count, genres=None):
+        titles = []
+        for idx in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category
+            )
+            title.genre.set(genres or [genre])
+            titles.append(title)
+        return titles
+    return create
@@ -3,6 +3,19 @@ from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import AccessToken
 
 
+@pytest.fixture
+def create_users(django_user_model):
+    """Создает пользователей `{prefix}N` с почтой `{prefix}N@yamdb.fake`."""
+    def create(count, prefix='author'):
+        return [
+            django_user_model.objects.create(
+                username=f'{prefix}{idx}', email=f'{prefix}{idx}@yamdb.fake'
+            )
+            for idx in range(count)
+        ]
+    return create
+
+
 @pytest.fixture
 def user_superuser(django_user_model):
     return django_user_model.objects.create_superuser(
@@ -0,0 +1,132 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.serializers import TitleGetSerializer
+from tests.utils import create_reviews, create_single_review
+from reviews.models import Review
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAPI:
+
+    def get_title(self, title_id):
+        return Title.objects.get(id=title_id)
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client, moderator,
+                                       moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что при создании отзыва сумма и количество оценок '
+            'произведения обновляются.'
+        )
+
+        create_single_review(moderator_client, titles[0]['id'], 'Ок', 8)
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'score': 2}
+        )
+        assert response.status_code == 200
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (15, 3), (
+            'Проверьте, что при изменении оценки отзыва сумма оценок '
+            'произведения пересчитывается.'
+        )
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        )
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что при удалении отзыва его оценка убирается из '
+            'рейтинга произведения.'
+        )
+
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 5
+
+        user.delete()
+        moderator.delete()
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (2, 1), (
+            'Проверьте, что при каскадном удалении отзывов рейтинг '
+            'произведения пересчитывается.'
+        )
+
+    def test_02_recompute_ratings(self, admin_client, admin, user,
+                                  user_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(rating_sum=0, rating_count=7)
+
+        out = StringIO()
+        call_command('recompute_ratings', '--dry-run', stdout=out)
+        assert 'Найдено расхождений: 2' in out.getvalue()
+        assert self.get_title(titles[0]['id']).rating_count == 7
+
+        call_command('recompute_ratings', stdout=StringIO())
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (10, 2)
+        title = self.get_title(titles[1]['id'])
+        assert (title.rating_sum, title.rating_count) == (0, 0)
+
+        out = StringIO()
+        call_command('recompute_ratings', stdout=out)
+        assert 'Расхождений не найдено' in out.getvalue()
+
+    def test_03_rating_field_without_annotation(self, admin_client, admin,
+                                                user, user_client,
+                                                django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        queryset = Title.objects.select_related('category').prefetch_related(
+            'genre'
+        )
+        page = list(queryset.order_by('id'))
+        with django_assert_num_queries(0):
+            data = TitleGetSerializer(page, many=True).data
+        assert [title['rating'] for title in data] == [5, None], (
+            'Проверьте, что рейтинг без аннотации queryset считается по '
+            'сохраненным оценкам без запросов к отзывам.'
+        )
+
+    def test_04_resave_without_loaded_state(self, admin, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=admin, text='Отзыв', score=4
+        )
+        Review.objects.create(title=title, author=user, text='Да', score=8)
+
+        partial = Review.objects.only('id', 'text').get(id=review.id)
+        partial.text = 'Новый текст'
+        partial.save()
+        Review(
+            id=review.id, title=title, author=admin, text='Отзыв', score=6,
+            pub_date=review.pub_date,
+        ).save()
+        loaded = Review.objects.get(id=review.id)
+        loaded.score = 10
+        loaded.save(update_fields=['text'])
+
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (14, 2), (
+            'Проверьте, что повторное сохранение отзыва без загруженных '
+            'оценки и произведения не учитывает его как новый.'
+        )
+        out = StringIO()
+        call_command('recompute_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений не найдено' in out.getvalue()
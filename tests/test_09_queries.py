@@ -0,0 +1,127 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comments, Review
+
+TITLES_LIST_QUERIES = 3
+TITLE_DETAIL_QUERIES = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Queries:
+
+    @pytest.fixture
+    def create_title_objects(self, create_titles, genre, other_genre):
+        return lambda count: create_titles(count, [genre, other_genre])
+
+    @pytest.mark.parametrize('titles_count', (1, 5))
+    def test_01_titles_list_queries(self, client, titles_count,
+                                    create_title_objects,
+                                    django_assert_num_queries):
+        create_title_objects(titles_count)
+        url = '/api/v1/titles/'
+        with django_assert_num_queries(TITLES_LIST_QUERIES):
+            response = client.get(url)
+        assert len(response.json()['results']) == titles_count, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет '
+            f'{TITLES_LIST_QUERIES} запроса к БД независимо от количества '
+            'произведений на странице.'
+        )
+
+    def test_02_title_detail_queries(self, client, create_title_objects,
+                                     django_assert_num_queries):
+        title = create_title_objects(1)[0]
+        url = f'/api/v1/titles/{title.id}/'
+        with django_assert_num_queries(TITLE_DETAIL_QUERIES):
+            response = client.get(url)
+        assert response.json()['category'] == {
+            'name': 'Фильм', 'slug': 'films'
+        }, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет '
+            f'{TITLE_DETAIL_QUERIES} запроса к БД.'
+        )
+
+    def test_03_reviews_list_queries(self, client, create_users,
+                                     create_title_objects,
+                                     assert_no_n_plus_one):
+        title = create_title_objects(1)[0]
+        authors = iter(create_users(5))
+
+        def add_reviews(count):
+            for _ in range(count):
+                Review.objects.create(
+                    title=title, author=next(authors), text='Отзыв', score=5
+                )
+
+        add_reviews(1)
+        assert_no_n_plus_one(
+            lambda: client.get(f'/api/v1/titles/{title.id}/reviews/'),
+            add_reviews,
+        )
+
+    def test_04_comments_list_queries(self, client, create_users,
+                                      create_title_objects,
+                                      assert_no_n_plus_one):
+        title = create_title_objects(1)[0]
+        authors = iter(create_users(6))
+        review = Review.objects.create(
+            title=title, author=next(authors), text='Отзыв', score=5
+        )
+
+        def add_comments(count):
+            for _ in range(count):
+                Comments.objects.create(
+                    review=review, author=next(authors), text='Комментарий'
+                )
+
+        add_comments(1)
+        assert_no_n_plus_one(
+            lambda: client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            ),
+            add_comments,
+        )
+
+    def test_05_parent_lookups(self, user_client, user, create_users,
+                               create_title_objects):
+        first, second = create_title_objects(2)
+        review = Review.objects.create(
+            title=first, author=user, text='Отзыв', score=5
+        )
+        url = f'/api/v1/titles/{second.id}/reviews/{review.id}/comments/'
+        assert user_client.get(url).status_code == 404, (
+            f'Проверьте, что `{url}` возвращает 404, если отзыв не '
+            'относится к произведению из URL.'
+        )
+        response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == 404
+
+        url = f'/api/v1/titles/{first.id}/reviews/{review.id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == 201
+        review_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_lookups) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` ищет отзыв в БД один раз.'
+        )
+
+        url = f'/api/v1/titles/{first.id}/reviews/'
+        author = create_users(1)[0]
+        Review.objects.filter(author=user).update(author=author)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Ок', 'score': 7})
+        assert response.status_code == 201
+        title_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "titles_title"' in query['sql']
+        ]
+        assert len(title_lookups) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` ищет произведение в БД '
+            'один раз.'
+        )
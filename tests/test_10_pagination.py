@@ -0,0 +1,124 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def collect_pages(self, client, url):
+        results = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == 200
+            assert not any(
+                'COUNT(' in query['sql'] for query in context.captured_queries
+            ), (
+                'Проверьте, что курсорная пагинация не выполняет COUNT.'
+            )
+            data = response.json()
+            assert 'count' not in data
+            results.extend(data['results'])
+            url = data['next']
+        return results
+
+    def test_01_titles_cursor(self, client):
+        titles = [
+            Title.objects.create(name=f'Произведение {idx}', year=2000)
+            for idx in range(7)
+        ]
+        results = self.collect_pages(
+            client, '/api/v1/titles/?pagination=cursor'
+        )
+        assert [title['id'] for title in results] == [
+            title.id for title in reversed(titles)
+        ], (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'возвращает все произведения по убыванию id без повторов.'
+        )
+
+    def test_02_reviews_cursor(self, client, create_users):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+            for author in create_users(7)
+        ]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        results = self.collect_pages(client, f'{url}?pagination=cursor')
+        assert sorted(review['id'] for review in results) == sorted(
+            review.id for review in reviews
+        ), (
+            f'Проверьте, что курсорная пагинация `{url}` возвращает все '
+            'отзывы без повторов.'
+        )
+
+        data = client.get(url).json()
+        assert data['count'] == len(reviews), (
+            f'Проверьте, что без параметра `pagination` `{url}` использует '
+            'пагинацию по номеру страницы.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CachedCount:
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        count_queries = [
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ]
+        return response.json()['count'], len(count_queries)
+
+    def test_01_titles_count_cache(self, client):
+        url = '/api/v1/titles/'
+        Title.objects.create(name='Произведение 1', year=2000)
+        assert self.count_queries(client, url) == (1, 1)
+        assert self.count_queries(client, url) == (1, 0), (
+            f'Проверьте, что `count` в ответе `{url}` берется из кеша.'
+        )
+        assert self.count_queries(client, f'{url}?year=2001') == (0, 1), (
+            'Проверьте, что количество кешируется отдельно для каждого '
+            'набора фильтров.'
+        )
+        assert self.count_queries(client, f'{url}?count=exact') == (1, 1), (
+            'Проверьте, что с параметром `count=exact` количество '
+            'считается запросом к БД.'
+        )
+
+        title = Title.objects.create(name='Произведение 2', year=2000)
+        assert self.count_queries(client, url) == (2, 1), (
+            'Проверьте, что кеш количества сбрасывается при добавлении '
+            'объекта.'
+        )
+        title.delete()
+        assert self.count_queries(client, url) == (1, 1), (
+            'Проверьте, что кеш количества сбрасывается при удалении '
+            'объекта.'
+        )
+
+    def test_02_stale_count_does_not_cut_page(self, client):
+        url = '/api/v1/titles/'
+        Title.objects.create(name='Произведение 1', year=2000)
+        assert self.count_queries(client, url) == (1, 1)
+        Title.objects.bulk_create([
+            Title(name=f'Произведение {idx}', year=2000)
+            for idx in range(2, 8)
+        ])
+        data = client.get(url).json()
+        assert len(data['results']) == 5 and data['next'], (
+            'Проверьте, что устаревшее количество из кеша не обрезает '
+            'страницу и не скрывает следующую.'
+        )
+        data = client.get(data['next']).json()
+        assert len(data['results']) == 2 and data['count'] == 7, (
+            'Проверьте, что количество уточняется по последней странице.'
+        )
@@ -0,0 +1,66 @@
+import pytest
+
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+    url = '/api/v1/titles/'
+
+    def search(self, client, text):
+        response = client.get(self.url, {'search': text})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_ranked(self, client):
+        Title.objects.create(
+            name='Крепкий орешек', year=1988, description='Боевик'
+        )
+        Title.objects.create(
+            name='Терминатор', year=1984,
+            description='Киборг против героя, крепкий сюжет'
+        )
+        Title.objects.create(name='Лев', year=1994, description='Мультфильм')
+
+        assert self.search(client, 'крепкий') == [
+            'Крепкий орешек', 'Терминатор'
+        ], (
+            f'Проверьте, что поиск `{self.url}?search=` находит '
+            'произведения по названию и описанию, а совпадения в названии '
+            'выводятся первыми.'
+        )
+        assert self.search(client, 'киборг') == ['Терминатор']
+        assert self.search(client, 'терм') == ['Терминатор'], (
+            'Проверьте, что поиск находит слова по префиксу.'
+        )
+        assert self.search(client, '"(*') == []
+
+    def test_02_search_index_follows_changes(self, client):
+        title = Title.objects.create(name='Крепкий орешек', year=1988)
+        title.name = 'Мост через реку Квай'
+        title.save()
+        assert self.search(client, 'орешек') == []
+        assert self.search(client, 'квай') == ['Мост через реку Квай']
+
+        Title.objects.bulk_create([Title(name='Квай 2', year=1990)])
+        assert set(self.search(client, 'квай')) == {
+            'Мост через реку Квай', 'Квай 2'
+        }
+        title.delete()
+        assert self.search(client, 'квай') == ['Квай 2'], (
+            'Проверьте, что поисковый индекс обновляется при изменении и '
+            'удалении произведений.'
+        )
+
+    def test_03_search_rejects_cursor(self, client):
+        Title.objects.create(name='Крепкий орешек', year=1988)
+        response = client.get(
+            self.url, {'search': 'крепкий', 'pagination': 'cursor'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что поиск нельзя совместить с курсорной пагинацией: '
+            'курсор сортирует по id, а не по релевантности.'
+        )
+        assert 'pagination' in response.json()
+        response = client.get(self.url, {'pagination': 'cursor'})
+        assert response.status_code == 200
@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+
+from api.filters import TitleFitler
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleFilters:
+    url = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self, category, other_category, genre, other_genre):
+        films, books = category, other_category
+        horror, drama = genre, other_genre
+        first = Title.objects.create(name='Оно', year=1986, category=books)
+        first.genre.set([horror, drama])
+        second = Title.objects.create(
+            name='Сияние', year=1980, category=films
+        )
+        second.genre.set([horror])
+        third = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, category=films
+        )
+        third.genre.set([drama])
+        return first, second, third
+
+    def get_names(self, client, params):
+        response = client.get(self.url, params)
+        assert response.status_code == 200
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_exact_and_in_filters(self, client, titles):
+        assert self.get_names(client, {'category': 'film'}) == [], (
+            f'Проверьте, что фильтр `category` в `{self.url}` сравнивает '
+            'слаг точно.'
+        )
+        assert self.get_names(client, {'category': 'films'}) == [
+            'Побег из Шоушенка', 'Сияние'
+        ]
+        assert self.get_names(client, {'category_in': 'books,films'}) == [
+            'Оно', 'Побег из Шоушенка', 'Сияние'
+        ]
+        assert self.get_names(client, {'genre_in': 'horror,drama'}) == [
+            'Оно', 'Побег из Шоушенка', 'Сияние'
+        ], (
+            f'Проверьте, что фильтр `genre_in` в `{self.url}` не дублирует '
+            'произведения с несколькими подходящими жанрами.'
+        )
+        assert self.get_names(client, {'year': 198}) == []
+        assert self.get_names(
+            client, {'year_min': 1980, 'year_max': 1986}
+        ) == ['Оно', 'Сияние']
+
+    def test_02_fuzzy_filters(self, client, titles):
+        assert self.get_names(client, {'genre': 'hor', 'fuzzy': 'true'}) == [
+            'Оно', 'Сияние'
+        ], (
+            f'Проверьте, что с параметром `fuzzy=true` фильтры `{self.url}` '
+            'ищут слаг по вхождению.'
+        )
+        assert self.get_names(client, {'year': 198, 'fuzzy': 'true'}) == [
+            'Оно', 'Сияние'
+        ]
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='План запроса SQLite'
+    )
+    @pytest.mark.parametrize('params, index', (
+        ({'year': 1980}, 'title_year_idx'),
+        ({'year_min': 1980, 'year_max': 1990}, 'title_year_idx'),
+        ({'category': 'films'}, 'titles_title_category_id'),
+        ({'category_in': 'films,books'}, 'titles_title_category_id'),
+        ({'genre': 'horror'}, 'titles_title_genre_genre_id'),
+        ({'genre_in': 'horror,drama'}, 'titles_title_genre_genre_id'),
+    ))
+    def test_03_filters_use_indexes(self, params, index):
+        queryset = TitleFitler(params, queryset=Title.objects.all()).qs
+        plan = queryset.explain()
+        assert index in plan and 'SCAN' not in plan, (
+            f'Проверьте, что фильтр {params} использует индекс {index}. '
+            f'План запроса:\n{plan}'
+        )
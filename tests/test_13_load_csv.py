@@ -0,0 +1,169 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.management.commands.load_csv_data import (CSV_SOURCES, DATA_DIR,
+                                                       resolve_order)
+from reviews.models import Comments, Review
+from titles.models import Category, Genre, Title
+from users.models import User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13LoadCsvData:
+
+    @pytest.mark.parametrize('workers', ('0', '2'))
+    def test_01_load_csv_data(self, workers):
+        out = StringIO()
+        call_command(
+            'load_csv_data', '--chunk-size', '10', '--workers', workers,
+            stdout=out
+        )
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что `load_csv_data` выводит скорость загрузки '
+            'каждого файла.'
+        )
+        assert Title.objects.count() == 32
+        assert Title.genre.through.objects.count() == 42
+        assert User.objects.count() == 5
+        assert Review.objects.count() == 72
+        assert Comments.objects.count() == 3
+
+        review = Review.objects.get(id=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что `load_csv_data` сохраняет дату отзыва из файла.'
+        )
+        assert Comments.objects.get(id=1).pub_date.year == 2020
+        assert Review._meta.get_field('pub_date').auto_now_add, (
+            'Проверьте, что `load_csv_data` не меняет определение поля '
+            '`pub_date`.'
+        )
+
+        out = StringIO()
+        call_command('recompute_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений не найдено' in out.getvalue(), (
+            'Проверьте, что `load_csv_data` обновляет рейтинг произведений.'
+        )
+
+    def test_02_load_order_and_data_dir(self, tmp_path):
+        order = [source.name for source in resolve_order(CSV_SOURCES)]
+        for before, after in (('Category', 'Title'), ('Title', 'Review'),
+                              ('User', 'Review'), ('Review', 'Comments'),
+                              ('Genre', 'GenreTitle')):
+            assert order.index(before) < order.index(after), (
+                'Проверьте, что файлы загружаются после файлов, на которые '
+                'они ссылаются.'
+            )
+
+        with pytest.raises(CommandError):
+            call_command('load_csv_data', '--data-dir', str(tmp_path))
+
+    def test_03_upsert_mode(self, tmp_path):
+        call_command('load_csv_data', '--workers', '0', stdout=StringIO())
+
+        out = StringIO()
+        call_command(
+            'load_csv_data', '--workers', '0', '--mode', 'upsert', stdout=out
+        )
+        assert 'review.csv: добавлено 0, обновлено 0, без изменений 72' in (
+            out.getvalue()
+        ), (
+            'Проверьте, что повторная загрузка в режиме upsert не изменяет '
+            'существующие строки.'
+        )
+
+        self.copy_data(tmp_path)
+        review = tmp_path / 'review.csv'
+        review.write_text(
+            review.read_text(encoding='utf-8').replace(
+                '"Ставлю десять звёзд!', '"Ставлю девять звёзд!', 1
+            ).replace(',100,10,2019-09-24', ',100,9,2019-09-24', 1),
+            encoding='utf-8'
+        )
+        users = tmp_path / 'users.csv'
+        users.write_text(
+            users.read_text(encoding='utf-8').rstrip()
+            + '\n999,newbie,bingobongo@yamdb.fake,user,,,\n',
+            encoding='utf-8'
+        )
+
+        out = StringIO()
+        call_command(
+            'load_csv_data', '--workers', '0', '--mode', 'upsert',
+            '--data-dir', str(tmp_path), stdout=out
+        )
+        assert 'review.csv: добавлено 0, обновлено 1, без изменений 71' in (
+            out.getvalue()
+        )
+        assert 'пропущено строк с занятыми уникальными полями: 1' in (
+            out.getvalue()
+        ), (
+            'Проверьте, что в режиме upsert строки, конфликтующие по '
+            'уникальным полям, пропускаются.'
+        )
+        assert Review.objects.get(id=1).score == 9
+        assert not User.objects.filter(id=999).exists()
+
+        out = StringIO()
+        call_command('recompute_ratings', '--dry-run', stdout=out)
+        assert 'Расхождений не найдено' in out.getvalue(), (
+            'Проверьте, что режим upsert обновляет рейтинг произведений.'
+        )
+
+    def copy_data(self, tmp_path):
+        for path in DATA_DIR.iterdir():
+            (tmp_path / path.name).write_bytes(path.read_bytes())
+
+    def test_04_upsert_slug_conflict(self, tmp_path):
+        call_command('load_csv_data', '--workers', '0', stdout=StringIO())
+        self.copy_data(tmp_path)
+        for filename in ('category.csv', 'genre.csv'):
+            path = tmp_path / filename
+            slug = path.read_text(encoding='utf-8').splitlines()[1]
+            path.write_text(
+                path.read_text(encoding='utf-8').rstrip()
+                + f'\n99,Копия,{slug.rsplit(",", 1)[1]}\n'
+                + '100,Новая,new_slug\n101,Повтор,new_slug\n',
+                encoding='utf-8'
+            )
+
+        out = StringIO()
+        call_command(
+            'load_csv_data', '--workers', '0', '--mode', 'upsert',
+            '--data-dir', str(tmp_path), stdout=out
+        )
+        for filename in ('category.csv', 'genre.csv'):
+            assert (
+                f'{filename}: пропущено строк с занятыми уникальными '
+                'полями: 2'
+            ) in out.getvalue(), (
+                'Проверьте, что в режиме upsert строки с занятым слагом '
+                'пропускаются.'
+            )
+        assert Category.objects.filter(slug='new_slug').get().id == 100
+        assert Genre.objects.filter(slug='new_slug').get().id == 100
+
+    def test_05_upsert_renumbered_genre_title(self, tmp_path):
+        call_command('load_csv_data', '--workers', '0', stdout=StringIO())
+        self.copy_data(tmp_path)
+        path = tmp_path / 'genre_title.csv'
+        header, *lines = path.read_text(encoding='utf-8').splitlines()
+        path.write_text(
+            '\n'.join([header] + [f'1{line}' for line in lines]) + '\n',
+            encoding='utf-8'
+        )
+
+        out = StringIO()
+        call_command(
+            'load_csv_data', '--workers', '0', '--mode', 'upsert',
+            '--data-dir', str(tmp_path), stdout=out
+        )
+        assert (
+            'genre_title.csv: пропущено строк с занятыми уникальными '
+            'полями: 42'
+        ) in out.getvalue(), (
+            'Проверьте, что в режиме upsert связи жанров с произведениями '
+            'под новыми id не дублируются.'
+        )
+        assert Title.genre.through.objects.count() == 42
@@ -0,0 +1,90 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.export import DATASETS, export_lines
+from reviews.models import Review
+from titles.models import Category, Genre, Title
+from users.models import User
+
+
+def snapshot():
+    return {
+        name: list(export_lines(name, 'ndjson')) for name in DATASETS
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Export:
+
+    def test_01_export_round_trip(self, tmp_path):
+        call_command('load_csv_data', '--workers', '0', stdout=StringIO())
+        Title.objects.filter(id=1).update(description='Описание, "кавычки"')
+        before = snapshot()
+
+        call_command(
+            'export_data', '--output-dir', str(tmp_path), stdout=StringIO()
+        )
+        for model in (Review, Title, Genre, Category, User):
+            model.objects.all().delete()
+        call_command(
+            'load_csv_data', '--workers', '0', '--data-dir', str(tmp_path),
+            stdout=StringIO()
+        )
+        assert snapshot() == before, (
+            'Проверьте, что CSV-выгрузка `export_data` загружается обратно '
+            'через `load_csv_data` без потерь.'
+        )
+
+        title = json.loads(before['titles'][0])
+        assert title['genre'] and title['rating'], (
+            'Проверьте, что выгрузка произведений содержит жанры и рейтинг.'
+        )
+
+    def test_02_export_endpoint(self, client, user_client, admin_client):
+        Title.objects.create(name='Терминатор', year=1984)
+        url = '/api/v1/export/titles.ndjson'
+        assert client.get(url).status_code == 401
+        assert user_client.get(url).status_code == 403, (
+            f'Проверьте, что `{url}` доступен только администратору.'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response.streaming, (
+            f'Проверьте, что `{url}` отдает потоковый ответ.'
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert json.loads(lines[0])['name'] == 'Терминатор'
+
+        response = admin_client.get('/api/v1/export/reviews.csv')
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content).decode().startswith(
+            'id,title_id,text,author,score,pub_date'
+        )
+        assert admin_client.get('/api/v1/export/titles.xml').status_code == (
+            404
+        )
+
+    @pytest.mark.parametrize('fmt, accept', (
+        ('csv', 'text/csv'),
+        ('ndjson', 'application/x-ndjson'),
+    ))
+    def test_03_export_accept_header(self, user_client, admin_client, fmt,
+                                     accept):
+        Title.objects.create(name='Терминатор', year=1984)
+        url = f'/api/v1/export/titles.{fmt}'
+        response = admin_client.get(url, HTTP_ACCEPT=accept)
+        assert response.status_code == 200, (
+            f'Проверьте, что `{url}` принимает заголовок Accept: {accept}.'
+        )
+        assert response['Content-Type'].startswith(accept)
+        assert 'Терминатор' in b''.join(
+            response.streaming_content
+        ).decode()
+        response = user_client.get(url, HTTP_ACCEPT=accept)
+        assert response.status_code == 403
+        assert 'detail' in response.json(), (
+            'Проверьте, что ошибки выгрузки возвращаются в JSON.'
+        )
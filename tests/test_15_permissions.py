@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+from api.permissions import IsAdmin, IsRedactor, Me
+from reviews.models import Comments, Review
+from titles.models import Title
+
+
+def make_request(user, method='PATCH'):
+    return SimpleNamespace(user=user, method=method)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15PermissionQueries:
+
+    @pytest.fixture
+    def review(self, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        Comments.objects.create(review=review, author=user, text='Ок')
+        return review
+
+    @pytest.mark.parametrize('model', (Review, Comments))
+    def test_01_is_redactor(self, model, review, user, moderator, admin,
+                            django_user_model, django_assert_num_queries):
+        obj = model.objects.get()
+        stranger = django_user_model.objects.create(
+            username='stranger', email='stranger@yamdb.fake'
+        )
+        expected = ((user, True), (moderator, True), (admin, True),
+                    (stranger, False))
+        with django_assert_num_queries(0):
+            for request_user, allowed in expected:
+                assert IsRedactor().has_object_permission(
+                    make_request(request_user), None, obj
+                ) is allowed, (
+                    'Проверьте, что IsRedactor разрешает изменение автору, '
+                    'модератору и админу.'
+                )
+
+    def test_02_is_admin(self, review, user, admin, user_superuser,
+                         django_assert_num_queries):
+        expected = ((user, False), (admin, True), (user_superuser, True))
+        with django_assert_num_queries(0):
+            for request_user, allowed in expected:
+                assert IsAdmin().has_object_permission(
+                    make_request(request_user), None, review
+                ) is allowed
+
+    def test_03_me(self, user, admin, django_user_model,
+                   django_assert_num_queries):
+        obj = django_user_model.objects.get(id=user.id)
+        with django_assert_num_queries(0):
+            assert Me().has_object_permission(
+                make_request(user), None, obj
+            )
+            assert not Me().has_object_permission(
+                make_request(admin), None, obj
+            )
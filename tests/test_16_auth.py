@@ -0,0 +1,134 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import UserCache, get_access_token, user_cache
+from api.utils import generate_short_hash_mm3
+from reviews.models import Review
+from titles.models import Title
+
+
+def make_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}')
+    return client
+
+
+def get_user_queries(context):
+    return [
+        query for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16StatelessAuth:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        user_cache.clear()
+
+    def test_01_no_user_queries(self, admin):
+        client = make_client(admin)
+        url = '/api/v1/categories/'
+        client.post(url, data={'name': 'Фильм', 'slug': 'films'})
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                url, data={'name': 'Книги', 'slug': 'books'}
+            )
+        assert response.status_code == 201
+        assert get_user_queries(context) == [], (
+            'Проверьте, что аутентификация по токену с полями пользователя '
+            'не загружает пользователя из БД.'
+        )
+
+    def test_02_token_from_confirmation(self, client, admin):
+        code = generate_short_hash_mm3(
+            f'{admin.username}{admin.email}{admin.updated_at}'
+        )
+        response = client.post('/api/v1/auth/token/', data={
+            'username': admin.username, 'confirmation_code': code
+        })
+        assert response.status_code == 200
+        response = client.get(
+            '/api/v1/users/me/',
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}',
+        )
+        assert response.status_code == 200
+        assert response.json()['role'] == 'admin', (
+            'Проверьте, что `/api/v1/users/me/` возвращает данные '
+            'пользователя при аутентификации по выданному токену.'
+        )
+
+    def test_03_role_change_revokes_token(self, admin):
+        client = make_client(admin)
+        url = '/api/v1/users/'
+        assert client.get(url).status_code == 200
+        admin.role = 'user'
+        admin.save()
+        assert client.get(url).status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены.'
+        )
+        assert make_client(admin).get(url).status_code == 403
+
+        admin.bio = 'Новая биография'
+        admin.save()
+        assert make_client(admin).get('/api/v1/users/me/').status_code == 200
+
+    def test_04_inactive_user(self, user):
+        client = make_client(user)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_05_create_review(self, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        client = make_client(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.post(url, data={'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        assert Review.objects.get().author_id == user.id
+        response = client.post(url, data={'text': 'Еще', 'score': 5})
+        assert response.status_code == 400
+
+    def test_06_user_cache(self, user_client, admin_client, user):
+        url = '/api/v1/users/me/'
+        user_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(url)
+        assert response.json()['role'] == 'user'
+        assert get_user_queries(context) == [], (
+            'Проверьте, что повторный запрос с тем же токеном берет '
+            'пользователя из кеша.'
+        )
+        assert user_cache.hit_ratio == 0.5
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == 200
+        assert user_client.get(url).json()['role'] == 'moderator', (
+            'Проверьте, что изменение пользователя удаляет его из кеша.'
+        )
+        user_client.patch(url, data={'bio': 'Новая биография'})
+        assert user_client.get(url).json()['bio'] == 'Новая биография'
+
+    def test_07_user_cache_limits(self, monkeypatch):
+        lru = UserCache(maxsize=2, timeout=60)
+        for key in ((1, 'a'), (2, 'b'), (3, 'c')):
+            lru.set(key, key)
+        assert lru.get((1, 'a')) is None, (
+            'Проверьте, что кеш вытесняет самую старую запись.'
+        )
+        assert lru.get((2, 'b')) == (2, 'b')
+        lru.invalidate(2)
+        assert lru.get((2, 'b')) is None
+        monkeypatch.setattr('api.authentication.time.monotonic', lambda: 1e12)
+        assert lru.get((3, 'c')) is None, (
+            'Проверьте, что записи кеша истекают через timeout секунд.'
+        )
+        assert (lru.hits, lru.misses) == (1, 3)
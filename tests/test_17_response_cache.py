@@ -0,0 +1,109 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comments, Review
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ResponseCache:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        return response.json(), len(context.captured_queries)
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/', '/api/v1/genres/', '/api/v1/categories/'
+    ))
+    def test_01_anonymous_cached(self, client, url, category, genre):
+        Title.objects.create(name='Терминатор', year=1984)
+        first, _ = self.get(client, url)
+        second, queries = self.get(client, url)
+        assert second == first and queries == 0, (
+            f'Проверьте, что повторный анонимный запрос к `{url}` '
+            'берет ответ из кеша.'
+        )
+        _, queries = self.get(client, f'{url}?search=терминатор')
+        assert queries > 0, (
+            'Проверьте, что ответы кешируются отдельно для каждой строки '
+            'запроса.'
+        )
+
+    def test_02_authenticated_not_cached(self, user_client):
+        Title.objects.create(name='Терминатор', year=1984)
+        self.get(user_client, '/api/v1/titles/')
+        _, queries = self.get(user_client, '/api/v1/titles/')
+        assert queries > 0
+
+    def test_03_titles_invalidation(self, client, admin_client, user,
+                                    category, genre):
+        title = Title.objects.create(
+            name='Терминатор', year=1984, category=category
+        )
+        url = '/api/v1/titles/'
+        detail_url = f'{url}{title.id}/'
+        self.get(client, url)
+        self.get(client, detail_url)
+
+        title.genre.set([genre])
+        data, _ = self.get(client, detail_url)
+        assert data['genre'] == [{'name': 'Ужасы', 'slug': 'horror'}], (
+            'Проверьте, что кеш сбрасывается при изменении жанров '
+            'произведения.'
+        )
+        category.name = 'Кино'
+        category.save()
+        data, _ = self.get(client, detail_url)
+        assert data['category']['name'] == 'Кино'
+
+        Review.objects.create(title=title, author=user, text='Ок', score=8)
+        data, _ = self.get(client, url)
+        assert data['results'][0]['rating'] == 8, (
+            'Проверьте, что кеш списка произведений сбрасывается при '
+            'добавлении отзыва.'
+        )
+        Title.objects.bulk_create([Title(name='Чужой', year=1979)])
+        data, _ = self.get(client, url)
+        assert data['count'] == 2
+        response = admin_client.patch(detail_url, data={'name': 'Хищник'})
+        assert response.status_code == 200
+        data, _ = self.get(client, detail_url)
+        assert data['name'] == 'Хищник'
+        admin_client.delete(detail_url)
+        assert client.get(detail_url).status_code == 404
+
+    def test_04_reviews_invalidation(self, client, user, user_client):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=user, text='Ок', score=8
+        )
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        self.get(client, reviews_url)
+        self.get(client, comments_url)
+
+        response = user_client.post(comments_url, data={'text': 'Согласен'})
+        assert response.status_code == 201
+        data, _ = self.get(client, comments_url)
+        assert data['count'] == 1, (
+            f'Проверьте, что кеш `{comments_url}` сбрасывается при '
+            'добавлении комментария.'
+        )
+        Comments.objects.all().delete()
+        data, _ = self.get(client, comments_url)
+        assert data['count'] == 0
+
+        user.username = 'Renamed'
+        user.save()
+        data, _ = self.get(client, reviews_url)
+        assert data['results'][0]['author'] == 'Renamed', (
+            'Проверьте, что кеш отзывов сбрасывается при изменении автора.'
+        )
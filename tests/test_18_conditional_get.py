@@ -0,0 +1,151 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+from reviews.models import Review
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ConditionalGet:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def review(self, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        return Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+
+    def test_01_etag(self, user_client, review):
+        url = f'/api/v1/titles/{review.title_id}/'
+        response = user_client.get(url)
+        etag = response['ETag']
+        last_modified = response.get('Last-Modified')
+        assert etag, f'Проверьте, что ответ `{url}` содержит заголовок ETag.'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Проверьте, что `{url}` отвечает 304 на If-None-Match с '
+            'текущим ETag.'
+        )
+        assert len(context.captured_queries) == 0, (
+            'Проверьте, что ETag вычисляется без запросов к БД, кроме '
+            'аутентификации.'
+        )
+        assert response['ETag'] == etag, (
+            'Проверьте, что ответ 304 содержит ETag.'
+        )
+        assert response.get('Last-Modified') == last_modified
+        assert user_client.get(
+            f'{url}?format=json', HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200
+
+        Title.objects.filter(id=review.title_id).update(name='Хищник')
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что ETag меняется после изменения ресурса.'
+        )
+        assert response.json()['name'] == 'Хищник'
+
+    def test_02_reviews_etag(self, client, user_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        response = user_client.patch(
+            f'{url}{review.id}/', data={'text': 'Новый текст'}
+        )
+        assert response.status_code == 200
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что ETag `{url}` меняется при изменении отзыва.'
+        )
+        assert response.json()['results'][0]['text'] == 'Новый текст'
+
+    def test_03_last_modified(self, client, monkeypatch, request):
+        url = '/api/v1/genres/'
+        modified = int(time.time())
+        monkeypatch.setattr('api.cache.time.time', lambda: modified + 0.5)
+        # Жанр создается после подмены времени изменения.
+        request.getfixturevalue('genre')
+        monkeypatch.setattr('api.cache.time.time', lambda: modified + 10)
+        response = client.get(url)
+        assert response['Last-Modified'] == http_date(modified), (
+            f'Проверьте, что ответ `{url}` содержит Last-Modified.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(modified)
+        )
+        assert response.status_code == 304
+        assert response['Last-Modified'] == http_date(modified), (
+            'Проверьте, что ответ 304 содержит Last-Modified.'
+        )
+        assert response['ETag']
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(modified - 1)
+        )
+        assert response.status_code == 200
+
+    def test_04_same_second_write(self, client, monkeypatch):
+        modified = int(time.time())
+        monkeypatch.setattr('api.cache.time.time', lambda: modified + 0.1)
+        title = Title.objects.create(name='Терминатор', year=1984)
+        monkeypatch.setattr('api.cache.time.time', lambda: modified + 0.9)
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert not response.has_header('Last-Modified'), (
+            'Проверьте, что Last-Modified не отдается, пока не закончилась '
+            'секунда последнего изменения.'
+        )
+
+    def test_05_per_resource_etag(self, client, user_client, admin):
+        titles = [
+            Title.objects.create(name=name, year=1984)
+            for name in ('Терминатор', 'Хищник')
+        ]
+        reviews = [
+            Review.objects.create(
+                title=titles[0], author=admin, text='Отзыв', score=5
+            ),
+            Review.objects.create(
+                title=titles[1], author=admin, text='Отзыв', score=7
+            ),
+        ]
+        urls = [
+            f'/api/v1/titles/{titles[1].id}/',
+            f'/api/v1/titles/{titles[1].id}/reviews/',
+            f'/api/v1/titles/{titles[1].id}/reviews/{reviews[1].id}/'
+            'comments/',
+            f'/api/v1/titles/?ids={titles[1].id}',
+        ]
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        detail_url = f'/api/v1/titles/{titles[0].id}/'
+        etag = client.get(detail_url)['ETag']
+
+        response = user_client.post(
+            f'{detail_url}reviews/', data={'text': 'Отзыв', 'score': 9}
+        )
+        assert response.status_code == 201
+        response = user_client.post(
+            f'{detail_url}reviews/{reviews[0].id}/comments/',
+            data={'text': 'Согласен'},
+        )
+        assert response.status_code == 201
+        # Выдача токена сохраняет только updated_at автора.
+        admin.save(update_fields=['updated_at'])
+        for url, old_etag in etags.items():
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=old_etag
+            ).status_code == 304, (
+                f'Проверьте, что ETag `{url}` не меняется при записи '
+                'в другое произведение и при выдаче токена.'
+            )
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['rating'] == 7
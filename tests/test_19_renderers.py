@@ -0,0 +1,76 @@
+import datetime
+import decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+from titles.models import Title
+
+DATA = {
+    'results': [{
+        'name': 'Сияние\u2028',
+        'rating': 7.5,
+        'pub_date': datetime.datetime(2023, 7, 13, 14, 52, 1, 123456,
+                                      tzinfo=datetime.timezone.utc),
+        'price': decimal.Decimal('1.10'),
+        'detail': gettext_lazy('Not found.'),
+        'genre': [],
+    }],
+    'next': None,
+    1: 'ключ-число',
+}
+
+
+class StdlibJSONRenderer(FastJSONRenderer):
+    use_orjson = False
+
+
+class Test19Renderers:
+
+    @pytest.mark.parametrize('renderer_class', (
+        StdlibJSONRenderer,
+        pytest.param(
+            FastJSONRenderer,
+            marks=pytest.mark.skipif(orjson is None, reason='Нет orjson'),
+        ),
+    ))
+    def test_01_renderer_output(self, renderer_class):
+        expected = JSONRenderer().render(DATA, 'application/json')
+        rendered = renderer_class().render(DATA, 'application/json')
+        assert rendered == expected, (
+            f'Проверьте, что {renderer_class.__name__} выдает тот же JSON, '
+            'что и JSONRenderer.'
+        )
+        assert renderer_class().render(
+            DATA, 'application/json; indent=4'
+        ) == JSONRenderer().render(DATA, 'application/json; indent=4')
+        assert renderer_class().render(None) == b''
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19JSONApi:
+
+    def test_01_cyrillic_response(self, client):
+        Title.objects.create(name='Сияние', year=1980)
+        response = client.get('/api/v1/titles/')
+        assert 'Сияние'.encode() in response.content, (
+            'Проверьте, что кириллица в ответе API не экранируется.'
+        )
+
+    def test_02_json_request(self, admin_client):
+        response = admin_client.post(
+            '/api/v1/categories/',
+            data='{"name": "Фильм", "slug": "films"}',
+            content_type='application/json',
+        )
+        assert response.status_code == 201
+        assert response.json() == {'name': 'Фильм', 'slug': 'films'}
+        response = admin_client.post(
+            '/api/v1/categories/',
+            data='{"name": "Фильм",',
+            content_type='application/json',
+        )
+        assert response.status_code == 400
+        assert response.json()['detail'].startswith('JSON parse error')
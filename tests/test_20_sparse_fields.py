@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comments, Review
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SparseFields:
+
+    @pytest.fixture
+    def review(self, user, category, genre):
+        title = Title.objects.create(
+            name='Сияние', year=1980, category=category,
+            description='Отель "Оверлук"',
+        )
+        title.genre.set([genre])
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=9
+        )
+        Comments.objects.create(review=review, author=user, text='Ок')
+        return review
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        return response.json(), context.captured_queries
+
+    def test_01_titles_fields(self, client, review):
+        url = '/api/v1/titles/?fields=id,name,rating'
+        data, queries = self.get(client, url)
+        assert data['results'] == [
+            {'id': review.title_id, 'name': 'Сияние', 'rating': 9.0}
+        ], f'Проверьте, что `{url}` возвращает только выбранные поля.'
+        sql = ' '.join(query['sql'] for query in queries)
+        assert 'titles_genre' not in sql and 'titles_category' not in sql, (
+            f'Проверьте, что `{url}` не загружает жанры и категорию.'
+        )
+        assert 'description' not in sql, (
+            f'Проверьте, что `{url}` не читает лишние колонки.'
+        )
+
+        data, queries = self.get(
+            client, f'/api/v1/titles/{review.title_id}/?omit=rating,genre'
+        )
+        assert set(data) == {'id', 'name', 'year', 'description', 'category'}
+        assert data['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert not any(
+            'rating_sum' in query['sql'] or 'titles_genre' in query['sql']
+            for query in queries
+        ), 'Проверьте, что без рейтинга он не вычисляется.'
+
+    def test_02_reviews_and_comments_fields(self, client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        data, queries = self.get(client, f'{url}?fields=id,score')
+        assert data['results'] == [{'id': review.id, 'score': 9}]
+        assert not any('users_user' in query['sql'] for query in queries), (
+            'Проверьте, что без поля `author` автор не загружается.'
+        )
+        data, _ = self.get(client, f'{url}?fields=author&pagination=cursor')
+        assert data['results'] == [{'author': 'TestUser'}]
+
+        url = f'{url}{review.id}/comments/?omit=id,pub_date'
+        data, _ = self.get(client, url)
+        assert data['results'] == [{'text': 'Ок', 'author': 'TestUser'}]
+        data, _ = self.get(client, '/api/v1/genres/?fields=slug')
+        assert data['results'] == [{'slug': 'horror'}]
+
+    def test_03_unknown_field(self, client, review):
+        url = '/api/v1/titles/?fields=id,price'
+        response = client.get(url)
+        assert response.status_code == 400, (
+            f'Проверьте, что `{url}` с неизвестным полем возвращает 400.'
+        )
+        assert 'price' in response.json()['fields'][0]
+
+    @pytest.mark.parametrize('fields', ('text', 'author', 'id,pub_date'))
+    def test_04_no_deferred_loads(self, client, review, admin,
+                                  django_assert_num_queries, fields):
+        Review.objects.create(
+            title=review.title, author=admin, text='Отзыв', score=5
+        )
+        Comments.objects.create(review=review, author=admin, text='Да')
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        # Родитель из URL и страница объектов, без запроса на строку.
+        with django_assert_num_queries(2):
+            response = client.get(f'{url}?fields={fields}&pagination=cursor')
+        assert len(response.json()['results']) == 2
+        url = f'{url}{review.id}/comments/'
+        with django_assert_num_queries(2):
+            response = client.get(f'{url}?fields={fields}&pagination=cursor')
+        assert len(response.json()['results']) == 2
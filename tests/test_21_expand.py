@@ -0,0 +1,86 @@
+import pytest
+from django.conf import settings
+
+from reviews.models import Comments, Review
+from titles.models import Title
+
+REVIEWS = settings.EXPAND_REVIEWS_LIMIT + 2
+COMMENTS = settings.EXPAND_COMMENTS_LIMIT + 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Expand:
+
+    @pytest.fixture
+    def titles(self, create_users):
+        authors = create_users(REVIEWS)
+        titles = []
+        for idx in range(3):
+            title = Title.objects.create(name=f'Произведение {idx}', year=2000)
+            for author in authors:
+                review = Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=5
+                )
+                for number in range(COMMENTS):
+                    Comments.objects.create(
+                        review=review, author=author, text=f'{number}'
+                    )
+            titles.append(title)
+        return titles
+
+    def test_01_expand_reviews(self, client, titles):
+        title = titles[0]
+        url = f'/api/v1/titles/{title.id}/?expand=reviews'
+        data = client.get(url).json()
+        expected = list(
+            title.reviews.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )[:settings.EXPAND_REVIEWS_LIMIT]
+        )
+        assert [review['id'] for review in data['reviews']] == expected, (
+            f'Проверьте, что `{url}` встраивает последние '
+            f'{settings.EXPAND_REVIEWS_LIMIT} отзывов.'
+        )
+        assert data['reviews'][0]['author'].startswith('author')
+        assert 'comments' not in data['reviews'][0]
+        data = client.get(f'/api/v1/titles/{title.id}/').json()
+        assert 'reviews' not in data
+
+    def test_02_expand_comments(self, client, titles):
+        url = '/api/v1/titles/?expand=reviews.comments'
+        data = client.get(url).json()
+        for title in data['results']:
+            assert len(title['reviews']) == settings.EXPAND_REVIEWS_LIMIT
+            for review in title['reviews']:
+                assert [
+                    comment['text'] for comment in review['comments']
+                ] == [
+                    str(number) for number in range(COMMENTS)
+                ][::-1][:settings.EXPAND_COMMENTS_LIMIT], (
+                    f'Проверьте, что `{url}` встраивает последние '
+                    'комментарии каждого отзыва.'
+                )
+
+    def test_03_bounded_queries(self, client, titles,
+                                django_assert_num_queries):
+        url = '/api/v1/titles/?expand=reviews.comments'
+        # Произведения, количество, жанры, отзывы и комментарии.
+        with django_assert_num_queries(5):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_04_unknown_expand(self, client, titles):
+        response = client.get('/api/v1/titles/?expand=genre')
+        assert response.status_code == 400
+        assert 'genre' in response.json()['expand'][0]
+
+    def test_05_cache_follows_comments(self, client, titles, user):
+        review = titles[0].reviews.order_by('-pub_date', '-id').first()
+        url = f'/api/v1/titles/{titles[0].id}/?expand=reviews.comments'
+        client.get(url)
+        Comments.objects.create(review=review, author=user, text='Новый')
+        data = client.get(url).json()
+        assert data['reviews'][0]['comments'][0]['text'] == 'Новый', (
+            'Проверьте, что кеш ответа с комментариями сбрасывается при '
+            'добавлении комментария.'
+        )
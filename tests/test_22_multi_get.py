@@ -0,0 +1,55 @@
+import pytest
+from django.conf import settings
+
+from reviews.models import Review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22MultiGet:
+    url = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self, user, create_titles):
+        titles = create_titles(10)
+        Review.objects.create(
+            title=titles[3], author=user, text='Отзыв', score=7
+        )
+        return titles
+
+    def test_01_order_and_missing(self, client, titles):
+        ids = [titles[3].id, titles[0].id, 999, titles[7].id, titles[0].id]
+        response = client.get(self.url, {'ids': ','.join(map(str, ids))})
+        assert response.status_code == 200
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            titles[3].id, titles[0].id, titles[7].id
+        ], (
+            f'Проверьте, что `{self.url}?ids=` возвращает произведения в '
+            'порядке запроса.'
+        )
+        assert data['missing'] == [999], (
+            f'Проверьте, что `{self.url}?ids=` перечисляет не найденные id.'
+        )
+        first = data['results'][0]
+        assert first['rating'] == 7
+        assert first['genre'] == [{'name': 'Ужасы', 'slug': 'horror'}]
+        assert first['category'] == {'name': 'Фильм', 'slug': 'films'}
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_02_constant_queries(self, client, titles, count,
+                                 django_assert_num_queries):
+        ids = ','.join(str(title.id) for title in titles[:count])
+        # Произведения и жанры.
+        with django_assert_num_queries(2):
+            response = client.get(self.url, {'ids': ids})
+        assert len(response.json()['results']) == count
+
+    @pytest.mark.parametrize('ids', (
+        '', '1,a', ','.join(map(str, range(settings.MULTI_GET_LIMIT + 1)))
+    ))
+    def test_03_invalid_ids(self, client, ids):
+        response = client.get(self.url, {'ids': ids})
+        assert response.status_code == 400, (
+            f'Проверьте, что `{self.url}?ids=` проверяет список id.'
+        )
+        assert 'ids' in response.json()
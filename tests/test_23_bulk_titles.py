@@ -0,0 +1,128 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('category', 'other_category', 'genre', 'other_genre')
+class Test23BulkTitles:
+    url = '/api/v1/titles/bulk/'
+
+    def make_items(self, count):
+        return [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx % 20,
+                'description': 'Описание',
+                'genre': ['horror', 'drama'] if idx % 2 else ['drama'],
+                'category': 'films' if idx % 2 else 'books',
+            }
+            for idx in range(count)
+        ]
+
+    def post(self, client, items):
+        return client.post(
+            self.url, data=json.dumps(items), content_type='application/json'
+        )
+
+    def test_01_permissions(self, client, user_client):
+        assert self.post(client, self.make_items(1)).status_code == 401
+        assert self.post(user_client, self.make_items(1)).status_code == 403
+
+    @pytest.mark.parametrize('count', (1, 50))
+    def test_02_bulk_create(self, admin_client, count):
+        items = self.make_items(count)
+        with CaptureQueriesContext(connection) as context:
+            response = self.post(admin_client, items)
+        assert response.status_code == 201, response.json()
+        data = response.json()
+        assert [item['name'] for item in data] == [
+            item['name'] for item in items
+        ]
+        titles = Title.objects.in_bulk([item['id'] for item in data])
+        assert len(titles) == count
+        for item in data:
+            title = titles[item['id']]
+            assert title.name == item['name']
+            assert title.category.slug == item['category']
+            assert sorted(
+                title.genre.values_list('slug', flat=True)
+            ) == sorted(item['genre']), (
+                'Проверьте, что массовая загрузка сохраняет жанры '
+                'произведений.'
+            )
+        lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and ('FROM "titles_category"' in query['sql']
+                 or 'FROM "titles_genre"' in query['sql'])
+        ]
+        assert len(lookups) == 2, (
+            'Проверьте, что слаги категорий и жанров проверяются одним '
+            'запросом каждые.'
+        )
+
+    def test_03_bulk_update(self, admin_client):
+        created = self.post(admin_client, self.make_items(2)).json()
+        items = self.make_items(1)
+        items[0].update(
+            id=created[1]['id'], name='Новое', genre=['horror'],
+            category='books',
+        )
+        response = self.post(admin_client, items)
+        assert response.status_code == 201
+        assert response.json()[0]['id'] == created[1]['id']
+        title = Title.objects.get(id=created[1]['id'])
+        assert title.name == 'Новое' and title.category.slug == 'books'
+        assert list(title.genre.values_list('slug', flat=True)) == ['horror']
+        assert Title.objects.count() == 2
+
+    def test_04_partial_update(self, admin_client):
+        created = self.post(admin_client, self.make_items(2)).json()
+        items = self.make_items(2)
+        for item, title in zip(items, created):
+            item.update(id=title['id'], genre=['drama', 'drama'])
+        items[0].update(description='Новое')
+        del items[1]['description']
+        response = self.post(admin_client, items)
+        assert response.status_code == 201
+        assert [item['genre'] for item in response.json()] == [
+            ['drama'], ['drama']
+        ], 'Проверьте, что повторы жанров не возвращаются в ответе.'
+        descriptions = dict(Title.objects.values_list('id', 'description'))
+        assert descriptions == {
+            created[0]['id']: 'Новое', created[1]['id']: 'Описание',
+        }, (
+            'Проверьте, что при обновлении не переданные поля '
+            'не затираются.'
+        )
+
+    def test_05_item_errors(self, admin_client):
+        items = self.make_items(4)
+        items[3]['year'] = 3000
+        response = self.post(admin_client, items)
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == 4 and errors[0] == {}, (
+            'Проверьте, что ошибки возвращаются по каждому элементу.'
+        )
+        assert 'year' in errors[3]
+
+        items[1]['category'] = 'music'
+        items[2]['genre'] = ['drama', 'jazz']
+        items[3].update(id=999, year=2000)
+        response = self.post(admin_client, items)
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {} and 'category' in errors[1]
+        assert 'jazz' in errors[2]['genre'][0]
+        assert 'id' in errors[3]
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке ничего не сохраняется.'
+        )
+        response = self.post(admin_client, {'name': 'Не список'})
+        assert response.status_code == 400
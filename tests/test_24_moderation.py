@@ -0,0 +1,147 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comments, Review, ReviewQuerySet
+from titles.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Moderation:
+    reviews_url = '/api/v1/moderation/reviews/delete/'
+    comments_url = '/api/v1/moderation/comments/delete/'
+
+    @pytest.fixture
+    def spammer(self, django_user_model):
+        return django_user_model.objects.create(
+            username='spammer', email='spammer@yamdb.fake'
+        )
+
+    @pytest.fixture
+    def titles(self, user, spammer):
+        titles = []
+        for idx in range(3):
+            title = Title.objects.create(name=f'Произведение {idx}', year=2000)
+            for author, score in ((user, 8), (spammer, 1)):
+                review = Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=score
+                )
+                Comments.objects.create(
+                    review=review, author=spammer, text='Спам'
+                )
+                Comments.objects.create(
+                    review=review, author=user, text='Ок'
+                )
+            titles.append(title)
+        return titles
+
+    def post(self, client, url, data):
+        return client.post(
+            url, data=json.dumps(data), content_type='application/json'
+        )
+
+    def test_01_permissions(self, client, user_client, titles):
+        data = {'author': 'spammer'}
+        assert self.post(client, self.reviews_url, data).status_code == 401
+        response = self.post(user_client, self.reviews_url, data)
+        assert response.status_code == 403, (
+            'Проверьте, что массовое удаление доступно только модератору.'
+        )
+        assert Review.objects.count() == 6
+
+    def test_02_delete_reviews_by_author(self, moderator_client, titles,
+                                         monkeypatch):
+        monkeypatch.setattr('django.conf.settings.MODERATION_BATCH_SIZE', 2)
+        with CaptureQueriesContext(connection) as context:
+            response = self.post(
+                moderator_client, self.reviews_url, {'author': 'spammer'}
+            )
+        assert response.status_code == 200
+        assert response.json() == {'deleted': 3}
+        assert not Review.objects.filter(author__username='spammer').exists()
+        assert Comments.objects.count() == 6, (
+            'Проверьте, что вместе с отзывами удаляются их комментарии.'
+        )
+        for title in Title.objects.all():
+            assert (title.rating_sum, title.rating_count) == (8, 1), (
+                'Проверьте, что рейтинг произведений пересчитывается после '
+                'массового удаления.'
+            )
+        updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "titles_title"')
+        ]
+        assert len(updates) == 1, (
+            'Проверьте, что рейтинг пересчитывается одним запросом после '
+            'всех пачек, а не на каждый удаленный отзыв.'
+        )
+        data = moderator_client.get(
+            f'/api/v1/titles/{titles[0].id}/'
+        ).json()
+        assert data['rating'] == 8
+
+    def test_03_delete_comments(self, admin_client, titles):
+        review = titles[0].reviews.first()
+        response = self.post(admin_client, self.comments_url, {
+            'author': 'spammer', 'title': titles[0].id,
+        })
+        assert response.json() == {'deleted': 2}
+        assert Comments.objects.filter(author__username='spammer').count() == 4
+        ids = list(review.comments.values_list('id', flat=True))
+        response = self.post(admin_client, self.comments_url, {'ids': ids})
+        assert response.json() == {'deleted': 1}
+        assert not review.comments.exists()
+        assert Review.objects.count() == 6
+
+    def test_04_date_range(self, moderator_client, titles):
+        review = Review.objects.order_by('pub_date').first()
+        response = self.post(moderator_client, self.reviews_url, {
+            'since': '2000-01-01T00:00:00Z',
+            'until': review.pub_date.isoformat(),
+        })
+        assert response.json() == {'deleted': 1}
+        assert not Review.objects.filter(id=review.id).exists()
+
+    def test_05_validation(self, moderator_client, titles):
+        response = self.post(moderator_client, self.reviews_url, {})
+        assert response.status_code == 400, (
+            'Проверьте, что без условий ничего не удаляется.'
+        )
+        response = self.post(
+            moderator_client, self.reviews_url, {'author': 'nobody'}
+        )
+        assert response.status_code == 400
+        response = self.post(moderator_client, self.reviews_url, {
+            'since': '2030-01-01T00:00:00Z', 'until': '2020-01-01T00:00:00Z',
+        })
+        assert response.status_code == 400
+        assert Review.objects.count() == 6
+
+    def test_06_interrupted_delete(self, moderator_client, titles,
+                                   monkeypatch):
+        monkeypatch.setattr('django.conf.settings.MODERATION_BATCH_SIZE', 1)
+        delete_batch = ReviewQuerySet.delete_batch
+        calls = []
+
+        def failing_delete_batch(queryset, ids):
+            calls.append(ids)
+            if len(calls) > 1:
+                raise RuntimeError('Соединение потеряно')
+            return delete_batch(queryset, ids)
+
+        monkeypatch.setattr(
+            ReviewQuerySet, 'delete_batch', failing_delete_batch
+        )
+        with pytest.raises(RuntimeError):
+            self.post(
+                moderator_client, self.reviews_url, {'author': 'spammer'}
+            )
+        assert Review.objects.filter(author__username='spammer').count() == 2
+        for title in Title.objects.all():
+            count = title.reviews.count()
+            assert title.rating_count == count, (
+                'Проверьте, что рейтинг пересчитывается и после прерванного '
+                'удаления.'
+            )
@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import EmailOutbox
+
+
+class FlakyBackend(EmailBackend):
+    """Не доставляет письма на адреса, начинающиеся с fail."""
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if any(message.to[0].startswith('fail') for message in messages):
+            raise ConnectionError('Сервер недоступен')
+        return super().send_messages(messages)
+
+
+class DownBackend(EmailBackend):
+    """Почтовый сервер недоступен."""
+
+    def open(self):
+        raise ConnectionError('Сервер недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.fixture
+    def flaky_backend(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_25_email_outbox.FlakyBackend'
+        FlakyBackend.opened = 0
+
+    def test_01_signup_enqueues(self, client):
+        mail.outbox = []
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            'Проверьте, что регистрация не отправляет письмо сама, а ставит '
+            'его в очередь.'
+        )
+        message = EmailOutbox.objects.get()
+        assert message.recipient == data['email']
+        assert message.sent_at is None
+        call_command('send_emails')
+        assert len(mail.outbox) == 1 and mail.outbox[0].to == [data['email']]
+        assert 'Код' in mail.outbox[0].body
+        message.refresh_from_db()
+        assert message.sent_at is not None and message.attempts == 1
+        assert message.body == '', (
+            'Проверьте, что текст с кодом не хранится после отправки.'
+        )
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_batches_share_connection(self, flaky_backend):
+        mail.outbox = []
+        for idx in range(7):
+            EmailOutbox.objects.enqueue(f'user{idx}@yamdb.fake', 'Тема', '')
+        call_command('send_emails', batch_size=3)
+        assert len(mail.outbox) == 7
+        assert FlakyBackend.opened == 1, (
+            'Проверьте, что все пачки отправляются через одно соединение.'
+        )
+        assert not EmailOutbox.objects.filter(sent_at__isnull=True).exists()
+
+    def test_03_retries(self, flaky_backend, settings):
+        mail.outbox = []
+        failing = EmailOutbox.objects.enqueue('fail@yamdb.fake', 'Тема', '')
+        EmailOutbox.objects.enqueue('ok@yamdb.fake', 'Тема', '')
+        call_command('send_emails')
+        assert [message.to for message in mail.outbox] == [
+            ['ok@yamdb.fake']
+        ], 'Проверьте, что ошибка одного письма не останавливает пачку.'
+        failing.refresh_from_db()
+        assert failing.sent_at is None and failing.attempts == 1
+        assert 'ConnectionError' in failing.last_error
+        delay = timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY)
+        assert failing.next_attempt_at > timezone.now() + delay / 2, (
+            'Проверьте, что повтор откладывается.'
+        )
+
+        for attempt in range(2, settings.EMAIL_OUTBOX_MAX_ATTEMPTS + 2):
+            EmailOutbox.objects.filter(id=failing.id).update(
+                next_attempt_at=timezone.now()
+            )
+            call_command('send_emails')
+        failing.refresh_from_db()
+        assert failing.attempts == settings.EMAIL_OUTBOX_MAX_ATTEMPTS, (
+            'Проверьте, что число попыток ограничено.'
+        )
+        assert len(mail.outbox) == 1
+
+    def test_04_connection_failure(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_25_email_outbox.DownBackend'
+        message = EmailOutbox.objects.enqueue('user@yamdb.fake', 'Тема', 'Код')
+        for attempt in range(1, settings.EMAIL_OUTBOX_MAX_ATTEMPTS + 1):
+            with pytest.raises(ConnectionError):
+                call_command('send_emails')
+            message.refresh_from_db()
+            assert message.attempts == attempt, (
+                'Проверьте, что ошибка соединения засчитывается как попытка.'
+            )
+            EmailOutbox.objects.filter(id=message.id).update(
+                next_attempt_at=timezone.now()
+            )
+        call_command('send_emails')
+        message.refresh_from_db()
+        assert message.attempts == settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        assert message.body == ''
+
+    def test_05_purge(self, settings):
+        old = timezone.now() - timedelta(
+            days=settings.EMAIL_OUTBOX_RETENTION_DAYS + 1
+        )
+        sent_old, sent_new, pending_old = (
+            EmailOutbox.objects.enqueue(f'user{idx}@yamdb.fake', 'Тема', '')
+            for idx in range(3)
+        )
+        EmailOutbox.objects.filter(id__in=[sent_old.id, sent_new.id]).update(
+            sent_at=timezone.now()
+        )
+        EmailOutbox.objects.filter(
+            id__in=[sent_old.id, pending_old.id]
+        ).update(created_at=old)
+        call_command('send_emails')
+        assert set(EmailOutbox.objects.values_list('id', flat=True)) == {
+            sent_new.id, pending_old.id
+        }, 'Проверьте, что старые отправленные письма удаляются.'